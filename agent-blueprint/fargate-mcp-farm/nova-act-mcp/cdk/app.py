@@ -5,10 +5,16 @@ CDK App Entry Point
 """
 
 import os
+
+# Skip construct stack-trace capture to speed up synth (must be set before
+# aws_cdk is imported, since the jsii runtime inherits the environment)
+os.environ.setdefault("CDK_DISABLE_STACK_TRACE", "1")
+
 from aws_cdk import App, Environment
 from stacks.nova_act_fargate_stack import NovaActFargateStack
 
-app = App()
+# tree.json is only needed by tooling that inspects the construct tree
+app = App(tree_metadata=False)
 
 # Get configuration from context or environment
 region = app.node.try_get_context("region") or "us-west-2"
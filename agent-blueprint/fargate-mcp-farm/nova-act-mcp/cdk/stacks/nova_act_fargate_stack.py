@@ -12,15 +12,57 @@ from aws_cdk import (
 )
 from aws_cdk import aws_ec2 as ec2
 from aws_cdk import aws_ecs as ecs
-from aws_cdk import aws_ecs_patterns as ecs_patterns
 from aws_cdk import aws_ecr as ecr
 from aws_cdk import aws_logs as logs
 from aws_cdk import aws_iam as iam
 from aws_cdk import aws_elasticloadbalancingv2 as elbv2
 from aws_cdk import aws_ssm as ssm
 from constructs import Construct
+import functools
 import os
+import types
 from pathlib import Path
+from typing import Mapping, Tuple
+
+# Nova Act MCP server sources (Dockerfile and .env files)
+_SRC_DIR = Path(__file__).resolve().parents[2] / "src"
+_ENV_FILES = (_SRC_DIR / ".env", _SRC_DIR / ".env.local")
+
+# Sensitive values that should only be in secrets (not environment variables)
+_SENSITIVE_KEYS = frozenset({"NOVA_ACT_API_KEY"})
+
+# Container-specific settings (override .env if needed); AWS_DEFAULT_REGION
+# depends on the stack and is added in _build_environment_variables
+_CONTAINER_SPECIFIC = types.MappingProxyType({
+    "PYTHONUNBUFFERED": "1",
+    "DISPLAY": ":99",
+    "DEPLOYMENT_MODE": "cloud",
+})
+
+
+def _parse_env(path: Path) -> dict:
+    """Parse KEY=VALUE lines from an env file, skipping blanks and comments"""
+    try:
+        content = path.read_text()
+    except FileNotFoundError:
+        return {}
+    return {
+        key.strip(): value.strip()
+        for key, sep, value in (line.partition('=') for line in content.splitlines())
+        if sep and not key.lstrip().startswith('#')
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _load_env_files() -> Tuple[Mapping[str, str], Mapping[str, str]]:
+    """Load .env and .env.local files (cached), split into public and secret values"""
+    env_vars = {}
+    # Public settings from .env first, sensitive values from .env.local override them
+    for env_file in _ENV_FILES:
+        env_vars.update(_parse_env(env_file))
+    public = {k: v for k, v in env_vars.items() if k not in _SENSITIVE_KEYS}
+    secrets = {k: v for k, v in env_vars.items() if k in _SENSITIVE_KEYS}
+    return types.MappingProxyType(public), types.MappingProxyType(secrets)
 
 
 class NovaActFargateStack(Stack):
@@ -36,17 +78,19 @@ class NovaActFargateStack(Stack):
         
 
         # Import shared VPC from Chatbot deployment
+        public_subnets = Fn.split(",", Fn.import_value("ChatbotStack-public-subnets"))
+        private_subnets = Fn.split(",", Fn.import_value("ChatbotStack-private-subnets"))
         vpc = ec2.Vpc.from_vpc_attributes(
             self, "SharedChatbotVpc",
-            vpc_id=Fn.import_value(f"ChatbotStack-vpc-id"),
+            vpc_id=Fn.import_value("ChatbotStack-vpc-id"),
             availability_zones=["us-west-2a", "us-west-2b"],  # Must match Chatbot VPC AZs
             public_subnet_ids=[
-                Fn.select(0, Fn.split(",", Fn.import_value(f"ChatbotStack-public-subnets"))),
-                Fn.select(1, Fn.split(",", Fn.import_value(f"ChatbotStack-public-subnets")))
+                Fn.select(0, public_subnets),
+                Fn.select(1, public_subnets)
             ],
             private_subnet_ids=[
-                Fn.select(0, Fn.split(",", Fn.import_value(f"ChatbotStack-private-subnets"))),
-                Fn.select(1, Fn.split(",", Fn.import_value(f"ChatbotStack-private-subnets")))
+                Fn.select(0, private_subnets),
+                Fn.select(1, private_subnets)
             ]
         )
 
@@ -80,10 +124,13 @@ class NovaActFargateStack(Stack):
             removal_policy=RemovalPolicy.DESTROY
         )
 
+        # Both the execution role and the task role are assumed by ECS tasks
+        ecs_tasks_principal = iam.ServicePrincipal("ecs-tasks.amazonaws.com")
+
         # Create task execution role
         execution_role = iam.Role(
             self, "NovaActMcpExecutionRole",
-            assumed_by=iam.ServicePrincipal("ecs-tasks.amazonaws.com"),
+            assumed_by=ecs_tasks_principal,
             managed_policies=[
                 iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AmazonECSTaskExecutionRolePolicy")
             ]
@@ -93,24 +140,21 @@ class NovaActFargateStack(Stack):
         ecr_repository.grant_pull(execution_role)
 
         # Create task role (for the container itself)
-        task_role_statements = [
-            iam.PolicyStatement(
-                effect=iam.Effect.ALLOW,
-                actions=[
-                    "logs:CreateLogStream",
-                    "logs:PutLogEvents"
-                ],
-                resources=[log_group.log_group_arn]
-            )
-        ]
-        
-        
         task_role = iam.Role(
             self, "NovaActMcpTaskRole",
-            assumed_by=iam.ServicePrincipal("ecs-tasks.amazonaws.com"),
+            assumed_by=ecs_tasks_principal,
             inline_policies={
                 "NovaActMcpPolicy": iam.PolicyDocument(
-                    statements=task_role_statements
+                    statements=[
+                        iam.PolicyStatement(
+                            effect=iam.Effect.ALLOW,
+                            actions=[
+                                "logs:CreateLogStream",
+                                "logs:PutLogEvents"
+                            ],
+                            resources=[log_group.log_group_arn]
+                        )
+                    ]
                 )
             }
         )
@@ -130,8 +174,8 @@ class NovaActFargateStack(Stack):
         )
 
         # Load API key from .env.local file (or fallback to default)
-        env_vars = self._load_env_files()
-        default_api_key = env_vars.get('NOVA_ACT_API_KEY', 'your_nova_act_api_key_here')
+        self._env_public, self._env_secrets = _load_env_files()
+        default_api_key = self._env_secrets.get('NOVA_ACT_API_KEY', 'your_nova_act_api_key_here')
 
         # Create parameter for Nova Act API Key (uses .env value as default)
         api_key_parameter = ssm.StringParameter(
@@ -175,7 +219,7 @@ class NovaActFargateStack(Stack):
 
         # Allow inbound traffic on port 8000 from ALB security group
         # Import VPC CIDR for security group rules
-        vpc_cidr = Fn.import_value(f"ChatbotStack-vpc-cidr")
+        vpc_cidr = Fn.import_value("ChatbotStack-vpc-cidr")
         service_security_group.add_ingress_rule(
             peer=ec2.Peer.ipv4(vpc_cidr),
             connection=ec2.Port.tcp(8000),
@@ -185,16 +229,16 @@ class NovaActFargateStack(Stack):
         # Import shared ALB from the MCP Farm infrastructure
         shared_alb = elbv2.ApplicationLoadBalancer.from_application_load_balancer_attributes(
             self, "SharedMcpFarmAlb",
-            load_balancer_arn=Fn.import_value(f"mcpfarmalbstack-mcp-farm-alb-arn"),
-            load_balancer_dns_name=Fn.import_value(f"mcpfarmalbstack-mcp-farm-alb-dns"),
+            load_balancer_arn=Fn.import_value("mcpfarmalbstack-mcp-farm-alb-arn"),
+            load_balancer_dns_name=Fn.import_value("mcpfarmalbstack-mcp-farm-alb-dns"),
             vpc=vpc,
-            security_group_id=Fn.import_value(f"mcpfarmalbstack-mcp-farm-alb-sg-id")
+            security_group_id=Fn.import_value("mcpfarmalbstack-mcp-farm-alb-sg-id")
         )
         
         # Import shared listener using from_application_listener_attributes
         shared_listener = elbv2.ApplicationListener.from_application_listener_attributes(
             self, "SharedMcpFarmListener",
-            listener_arn=Fn.import_value(f"mcpfarmalbstack-mcp-farm-listener-arn"),
+            listener_arn=Fn.import_value("mcpfarmalbstack-mcp-farm-listener-arn"),
             security_group=shared_alb.connections.security_groups[0]
         )
 
@@ -210,6 +254,13 @@ class NovaActFargateStack(Stack):
             security_groups=[service_security_group],
             vpc_subnets=ec2.SubnetSelection(
                 subnets=vpc.private_subnets
+            ),
+            # Deployment settings to speed up deployments
+            min_healthy_percent=0,
+            max_healthy_percent=200,
+            circuit_breaker=ecs.DeploymentCircuitBreaker(
+                enable=False,
+                rollback=False
             )
         )
 
@@ -248,17 +299,6 @@ class NovaActFargateStack(Stack):
         # Attach Fargate service to target group
         fargate_service.attach_to_application_target_group(target_group)
 
-        # Configure deployment settings to speed up deployments
-        cfn_service = fargate_service.node.default_child
-        cfn_service.add_property_override("DeploymentConfiguration", {
-            "MinimumHealthyPercent": 0,
-            "MaximumPercent": 200,
-            "DeploymentCircuitBreaker": {
-                "Enable": False,
-                "Rollback": False
-            }
-        })
-
         # Store ALB reference for other services to use
         self.shared_alb = shared_alb
         self.shared_listener = shared_listener
@@ -285,25 +325,24 @@ class NovaActFargateStack(Stack):
             scale_out_cooldown=Duration.minutes(2)
         )
 
-        # Outputs
+        # Outputs (each one is read by deploy.sh / deploy-all.sh; the shared ALB
+        # DNS name is published by McpFarmAlbStack itself)
+        alb_dns_name = shared_alb.load_balancer_dns_name
+        alb_url = f"http://{alb_dns_name}"
+        mcp_url = f"{alb_url}/nova-act/mcp"
+
         CfnOutput(
             self, "LoadBalancerUrl",
-            value=f"http://{shared_alb.load_balancer_dns_name}",
+            value=alb_url,
             description="MCP Farm Application Load Balancer URL"
         )
 
         CfnOutput(
             self, "McpEndpoint",
-            value=f"http://{shared_alb.load_balancer_dns_name}/nova-act/mcp",
+            value=mcp_url,
             description="Nova Act MCP Server Endpoint URL"
         )
 
-        CfnOutput(
-            self, "McpFarmAlbDnsName",
-            value=shared_alb.load_balancer_dns_name,
-            description="MCP Farm ALB DNS Name for adding additional MCP servers"
-        )
-
         CfnOutput(
             self, "EcrRepositoryUri",
             value=ecr_repository.repository_uri,
@@ -326,7 +365,7 @@ class NovaActFargateStack(Stack):
         ssm.StringParameter(
             self, "McpEndpointParameter",
             parameter_name="/mcp/endpoints/stateful/nova-act-mcp",
-            string_value=f"http://{shared_alb.load_balancer_dns_name}/nova-act/mcp",
+            string_value=mcp_url,
             description="Nova Act MCP Server endpoint URL"
         )
         
@@ -339,52 +378,8 @@ class NovaActFargateStack(Stack):
         self.target_group = target_group
         self.log_group = log_group
     
-    def _load_env_files(self) -> dict:
-        """Load environment variables from .env and .env.local files"""
-        src_dir = Path(__file__).parent.parent.parent / "src"
-        env_vars = {}
-        
-        # Load public settings from .env first
-        env_file = src_dir / ".env"
-        if env_file.exists():
-            with open(env_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        env_vars[key.strip()] = value.strip()
-        
-        # Load sensitive values from .env.local (overrides .env)
-        env_local_file = src_dir / ".env.local"
-        if env_local_file.exists():
-            with open(env_local_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        env_vars[key.strip()] = value.strip()
-        
-        return env_vars
-    
     def _build_environment_variables(self) -> dict:
         """Build environment variables for the container - loads from .env and .env.local files"""
-        # Start with .env and .env.local file values
-        env_vars = self._load_env_files()
-        
-        # Remove sensitive values that should only be in secrets (not environment variables)
-        sensitive_keys = ['NOVA_ACT_API_KEY']
-        for key in sensitive_keys:
-            env_vars.pop(key, None)
-        
-        # Add container-specific settings (override .env if needed)
-        container_specific = {
-            "PYTHONUNBUFFERED": "1",
-            "DISPLAY": ":99", 
-            "DEPLOYMENT_MODE": "cloud",
-            "AWS_DEFAULT_REGION": self.region
-        }
-        
-        # Merge with .env values taking precedence for app settings
-        env_vars.update(container_specific)
-        
-        return env_vars
+        # .env and .env.local values were loaded in __init__ with sensitive keys
+        # already split out; container-specific settings override them
+        return {**self._env_public, **_CONTAINER_SPECIFIC, "AWS_DEFAULT_REGION": self.region}
@@ -1,70 +1,186 @@
 import os
-import base64
-import tempfile
+import re
+import io
+import gc
+import time
+import signal
+import secrets
 import logging
-import traceback
 from typing import Dict, Any, Optional, Tuple
 from nova_act import NovaAct
-from nova_act_config import DEFAULT_BROWSER_SETTINGS
+from PIL import Image
+from nova_act_config import (
+    BROWSER_START_URL,
+    BROWSER_USER_DATA_DIR,
+    BROWSER_CLONE_USER_DATA,
+    LOGS_DIRECTORY,
+    BROWSER_RECORD_VIDEO,
+    BROWSER_DEBUG_GC,
+)
 from profile_manager import ProfileManager
 
+# libvips is optional; fall back to PIL when the library or binding is missing
+try:
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
+
 # Initialize profile manager instance
 profile_manager = ProfileManager()
 
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger("browser_controller")
 
+# Matches URLs that already carry a scheme (http://, https://, file://, chrome://, ...)
+_URL_HAS_SCHEME = re.compile(r'^[a-z][a-z0-9+.\-]*://', re.IGNORECASE).match
+
+# URL, title and ready state of the page in a single round-trip
+_PAGE_INFO_SCRIPT = "() => ({u: location.href, t: document.title, r: document.readyState})"
+
+def _downscale_jpeg_vips(screenshot_bytes: bytes, max_width: int, quality: int) -> bytes:
+    """Shrink a JPEG to max_width with libvips, which decodes at reduced scale (shrink-on-load)"""
+    if pyvips.Image.new_from_buffer(screenshot_bytes, "").width <= max_width:  # header only
+        return screenshot_bytes
+    image = pyvips.Image.thumbnail_buffer(screenshot_bytes, max_width, height=100000, size="down")
+    return image.jpegsave_buffer(Q=quality, strip=True, optimize_coding=False)
+
+def _downscale_jpeg_pil(screenshot_bytes: bytes, max_width: int, quality: int) -> bytes:
+    """Shrink a JPEG to max_width with PIL"""
+    # Use a more efficient approach with BytesIO
+    with io.BytesIO(screenshot_bytes) as input_buffer:
+        image = Image.open(input_buffer)
+        if image.width <= max_width:
+            return screenshot_bytes
+        
+        ratio = max_width / image.width
+        new_height = int(image.height * ratio)
+        # Let libjpeg downscale by 1/2, 1/4 or 1/8 while decoding (DCT domain)
+        # so the remaining resize works on a smaller bitmap
+        image.draft('RGB', (max_width, new_height))
+        if image.width != max_width:
+            # BILINEAR is cheaper than BICUBIC and indistinguishable at this quality
+            image = image.resize((max_width, new_height), Image.Resampling.BILINEAR)
+        
+        with io.BytesIO() as output_buffer:
+            # Skip the extra Huffman optimization and progressive passes;
+            # they rarely pay for themselves at this quality
+            image.save(
+                output_buffer, 
+                format='JPEG', 
+                quality=quality,
+                optimize=False,
+                progressive=False
+            )
+            return output_buffer.getvalue()
+
+def _define_page_function(key: str, function_source: str) -> str:
+    """JS statement defining a function as a read-only, non-enumerable window property"""
+    return (f"Object.defineProperty(window, '{key}', "
+            f"{{value: {function_source}, writable: false, enumerable: false, configurable: false}});")
+
+# Process groups of the running browsers, recorded at launch so the shutdown sweep
+# can signal them without enumerating processes
+browser_process_groups = set()
+
+def _get_browser_pgid(profile_dir: str) -> Optional[int]:
+    """Return the process group of the Chrome running on profile_dir, if any
+    
+    Chrome points <profile>/SingletonLock at "<hostname>-<pid>" while it runs, and
+    Playwright launches it detached as the leader of its own process group.
+    """
+    try:
+        pid = int(os.readlink(os.path.join(profile_dir, "SingletonLock")).rsplit("-", 1)[1])
+        pgid = os.getpgid(pid)
+    except (OSError, ValueError, IndexError):
+        return None
+    # Only a browser leading its own group; signalling a shared group could take the
+    # server or other sessions down
+    return pgid if pgid == pid and pgid != os.getpgrp() else None
+
+def _signal_process_group(pgid: int, sig: int) -> bool:
+    """Send sig to a process group; return False once the group is gone"""
+    try:
+        os.killpg(pgid, sig)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
+
+def kill_process_groups(pgids, timeout: float = 0.5) -> int:
+    """SIGTERM process groups, then SIGKILL the ones still there after timeout
+    
+    The groups are signalled together, so the wait is shared rather than per group.
+    Returns the number of groups that had to be killed.
+    """
+    alive = [pgid for pgid in pgids if _signal_process_group(pgid, signal.SIGTERM)]
+    deadline = time.monotonic() + timeout
+    while alive and time.monotonic() < deadline:
+        time.sleep(0.05)
+        # Signal 0 only checks whether any process of the group is left
+        alive = [pgid for pgid in alive if _signal_process_group(pgid, 0)]
+    for pgid in alive:
+        logger.warning("Force killing Chrome process group %s", pgid)
+        _signal_process_group(pgid, signal.SIGKILL)
+    return len(alive)
+
 class BrowserController:
+    __slots__ = (
+        'nova',
+        'session_id',
+        'api_key',
+        '_profile_dir',
+        '_viewport',
+        '_page_functions',
+        '_initialized',
+        '_browser_pgid',
+    )
+    
     def __init__(self, session_id: str = None):
         self.nova = None
         self.session_id = session_id
         self.api_key = os.environ.get("NOVA_ACT_API_KEY")
-        self.screenshots_dir = os.path.join(tempfile.gettempdir(), "nova_browser_screenshots")
-        os.makedirs(self.screenshots_dir, exist_ok=True)
+        self._profile_dir = None  # user data dir of the running browser
+        self._viewport = None  # viewport size, fixed for the lifetime of the browser
+        self._page_functions = {}  # function name -> window property it is registered under
+        self._initialized = False
+        self._browser_pgid = None  # process group of the running browser, if known
     
     def is_initialized(self) -> bool:
-        if self.nova is None:
-            return False
-        try:
-            # Check if nova client is properly started and page is accessible
-            return hasattr(self.nova, 'page') and self.nova.page is not None
-        except Exception:
-            # If accessing page throws an error, the client is not properly initialized
-            return False
+        # Set by initialize_browser() once the page is up and cleared by close()
+        return self._initialized
     
     def normalize_url(self, url: str) -> str:
-        if url == "about:blank":
+        if url == "about:blank" or _URL_HAS_SCHEME(url):
             return url
-        if not url.startswith(('http://', 'https://')):
-            return 'https://' + url
-        return url
+        return 'https://' + url
 
     def initialize_browser(self, headless: bool = True, starting_url: str = None) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
-        logger.info(f"[SESSION {self.session_id}] Initializing browser with headless={headless}")
-        logger.info(f"[SESSION {self.session_id}] Profile dir will be: {profile_dir if 'profile_dir' in locals() else 'TBD'}")
-        logger.info(f"[SESSION {self.session_id}] API key present: {bool(self.api_key)}")
+        logger.info("[SESSION %s] Initializing browser with headless=%s", self.session_id, headless)
+        logger.info("[SESSION %s] API key present: %s", self.session_id, bool(self.api_key))
         if not self.api_key:
             error_msg = "Nova Act API key not found in environment variables"
             logger.error(error_msg)
             return False, None, error_msg
         
         # Clean up any existing nova instance
+        self._initialized = False
         if self.nova is not None:
             try:
                 self.nova.stop()
                 logger.info("Stopped existing Nova Act instance")
             except Exception as e:
-                logger.warning(f"Error stopping existing Nova Act instance: {e}")
+                logger.warning("Error stopping existing Nova Act instance: %s", e)
             finally:
                 self.nova = None
+                self._page_functions.clear()
+                self._kill_browser_group()
             
         try:
-            url = starting_url or DEFAULT_BROWSER_SETTINGS.get("start_url", "https://www.google.com")
+            url = starting_url or BROWSER_START_URL
             url = self.normalize_url(url)
             
             # Get appropriate profile directory for this session
-            base_profile_dir = DEFAULT_BROWSER_SETTINGS.get("user_data_dir")
-            clone_enabled = DEFAULT_BROWSER_SETTINGS.get("clone_user_data_dir", True)  # Default to True for session isolation
+            base_profile_dir = BROWSER_USER_DATA_DIR
+            clone_enabled = BROWSER_CLONE_USER_DATA  # Defaults to True for session isolation
             
             if self.session_id and clone_enabled:
                 profile_dir = profile_manager.get_profile_for_session(
@@ -72,11 +188,12 @@ class BrowserController:
                     base_profile_dir, 
                     clone_enabled=True
                 )
-                logger.info(f"Session {self.session_id}: Using cloned profile directory: {profile_dir}")
+                logger.info("Session %s: Using cloned profile directory: %s", self.session_id, profile_dir)
             else:
                 profile_dir = base_profile_dir
-                logger.info(f"Session {self.session_id}: Using base profile directory: {profile_dir}")
+                logger.info("Session %s: Using base profile directory: %s", self.session_id, profile_dir)
             
+            self._profile_dir = profile_dir
             self.nova = NovaAct(
                 starting_page=url,
                 nova_act_api_key=self.api_key,
@@ -85,50 +202,58 @@ class BrowserController:
                 clone_user_data_dir=False,  # We handle cloning ourselves now
                 screen_width=1600,
                 screen_height=1200,
-                logs_directory=DEFAULT_BROWSER_SETTINGS.get("logs_directory"),
-                record_video=DEFAULT_BROWSER_SETTINGS.get("record_video", False)
+                logs_directory=LOGS_DIRECTORY,
+                record_video=BROWSER_RECORD_VIDEO
             )
             
             self.nova.start()
+            # Chrome has written its lock by now; remember its process group
+            self._browser_pgid = _get_browser_pgid(profile_dir)
+            if self._browser_pgid is not None:
+                browser_process_groups.add(self._browser_pgid)
+            self._viewport = self.nova.page.viewport_size or {'width': 1600, 'height': 1200}
             try:
                 # First wait for DOM to be ready (faster and more reliable)
                 self.nova.page.wait_for_load_state("domcontentloaded", timeout=10000)
                 logger.info("Page DOM loaded successfully")
                 
-                # Then give a short time for critical resources
+                # Then wait only until there is a body to act on; the load event
+                # often fires seconds later on pages with trackers and beacons
                 try:
-                    self.nova.page.wait_for_load_state("load", timeout=5000)
-                    logger.info("Page fully loaded")
+                    self.nova.page.wait_for_function(
+                        "() => document.readyState !== 'loading' && !!document.body",
+                        timeout=1500,
+                    )
+                    logger.info("Page ready")
                 except Exception:
-                    logger.info("Page load event timeout, but DOM is ready - proceeding")
+                    logger.info("Page readiness timeout, but DOM is ready - proceeding")
                     
             except Exception as dom_e:
-                logger.warning(f"DOM load failed after 10s, checking browser functionality...")
+                logger.warning("DOM load failed after 10s, checking browser functionality...")
                 try:
-                    current_url = self.nova.page.url
-                    title = self.nova.page.title()
-                    logger.info(f"Browser functional: {current_url} - {title}")
+                    info = self.nova.page.evaluate(_PAGE_INFO_SCRIPT)
+                    logger.info("Browser functional: %s - %s (%s)", info['u'], info['t'], info['r'])
                 except Exception:
                     raise Exception(f"Browser initialization failed: {dom_e}")
                     
             logger.info("Browser initialization completed")
+            self._initialized = True
             
             screenshot_data = self.take_screenshot()
             logger.info("Browser successfully initialized")
             return True, screenshot_data, None
             
         except Exception as e:
-            import traceback
+            self._initialized = False
             error_msg = str(e)
             
-            logger.error(f"Error initializing browser for session {self.session_id}: {error_msg}")
-            logger.error(f"Full traceback: {traceback.format_exc()}")
+            logger.exception("Error initializing browser for session %s: %s", self.session_id, error_msg)
             
             # Log key debugging info
-            logger.error(f"API key present: {bool(self.api_key)}")
-            logger.error(f"Profile dir: {profile_dir if 'profile_dir' in locals() else 'Not set'}")
-            logger.error(f"URL: {url}")
-            logger.error(f"Session ID: {self.session_id}")
+            logger.error("API key present: %s", bool(self.api_key))
+            logger.error("Profile dir: %s", self._profile_dir or 'Not set')
+            logger.error("URL: %s", url)
+            logger.error("Session ID: %s", self.session_id)
             
             return False, None, error_msg
 
@@ -140,15 +265,16 @@ class BrowserController:
             url = self.normalize_url(url)            
             self.nova.go_to_url(url)            
             screenshot_data = self.take_screenshot()
-            current_url = self.get_current_url()
+            current_url, page_title = self.get_page_state()
             
             return {
                 "current_url": current_url,
+                "page_title": page_title,
                 "screenshot": screenshot_data
             }
             
         except Exception as e:
-            logger.error(f"Error navigating to URL: {str(e)}")
+            logger.error("Error navigating to URL: %s", e)
             raise
     
     
@@ -167,9 +293,32 @@ class BrowserController:
             return result
             
         except Exception as e:
-            logger.error(f"Error executing action: {str(e)}")
+            logger.error("Error executing action: %s", e)
             raise
     
+    def _ensure_initialized(self, headless: bool, starting_url: str = None) -> Optional[str]:
+        """Initialize the browser if needed; return the error message if that fails"""
+        if self.is_initialized():
+            return None
+        
+        logger.info("[SESSION %s] Auto-initializing browser (headless: %s)", self.session_id, headless)
+        success, _, error_msg = self.initialize_browser(headless=headless, starting_url=starting_url)
+        return None if success else error_msg
+    
+    def ensure_initialized_and_goto(self, url: str, headless: bool = True) -> Tuple[bool, Any]:
+        """Initialize the browser if needed and navigate to url within one call on the session thread"""
+        error_msg = self._ensure_initialized(headless, starting_url=url)
+        if error_msg is not None:
+            return False, error_msg
+        return True, self.go_to_url(url)
+    
+    def ensure_initialized_and_act(self, instruction: str, headless: bool = True, schema: Dict = None, max_steps: int = 30, timeout: int = 300) -> Tuple[bool, Any]:
+        """Initialize the browser if needed and execute the action within one call on the session thread"""
+        error_msg = self._ensure_initialized(headless)
+        if error_msg is not None:
+            return False, error_msg
+        return True, self.execute_action(instruction, schema=schema, max_steps=max_steps, timeout=timeout)
+    
     def take_screenshot(self, max_width=800, quality=70) -> Dict[str, Any]:
         if not self.is_initialized():
             raise RuntimeError("Browser not initialized")
@@ -179,7 +328,7 @@ class BrowserController:
             adjusted_quality = min(quality, 65)  # Cap quality at 65 for better performance
             
             # Use Playwright's built-in clip functionality if available for better performance
-            viewport = self.nova.page.viewport_size
+            viewport = self._viewport
             if viewport and max_width < viewport.get('width', 1600):
                 # Calculate clip dimensions to reduce image size before processing
                 clip_width = min(viewport.get('width', 1600), 1200)  # Reasonable max width
@@ -190,49 +339,27 @@ class BrowserController:
                     quality=adjusted_quality,
                     clip={'x': 0, 'y': 0, 'width': clip_width, 'height': clip_height}
                 )
+                
+                # Downscale only if needed (significant size reduction)
+                if pyvips is not None:
+                    screenshot_bytes = _downscale_jpeg_vips(screenshot_bytes, max_width, adjusted_quality)
+                else:
+                    screenshot_bytes = _downscale_jpeg_pil(screenshot_bytes, max_width, adjusted_quality)
             else:
-                # Take full screenshot
+                # Take full screenshot; the viewport already fits in max_width,
+                # so the JPEG from Playwright is used as is
                 screenshot_bytes = self.nova.page.screenshot(type='jpeg', quality=adjusted_quality)
             
-            # Process with PIL only if necessary
-            from PIL import Image
-            import io
-            
-            # Use a more efficient approach with BytesIO
-            with io.BytesIO(screenshot_bytes) as input_buffer:
-                image = Image.open(input_buffer)
-                
-                # Only resize if needed (significant size reduction)
-                if image.width > max_width:
-                    ratio = max_width / image.width
-                    new_height = int(image.height * ratio)
-                    # Use BICUBIC for better performance than LANCZOS
-                    image = image.resize((max_width, new_height), Image.BICUBIC)
-                    
-                    with io.BytesIO() as output_buffer:
-                        # Use optimized settings for JPEG
-                        image.save(
-                            output_buffer, 
-                            format='JPEG', 
-                            quality=adjusted_quality,
-                            optimize=True,
-                            progressive=True
-                        )
-                        screenshot_bytes = output_buffer.getvalue()
-            
-            # Calculate size and encode
-            byte_size = len(screenshot_bytes)
-            base64_data = base64.b64encode(screenshot_bytes).decode('utf-8')
-            
+            # Keep the raw JPEG; it is only encoded when the response is serialized
             return {
                 "format": "jpeg",
-                "data": base64_data,
-                "size": byte_size
+                "bytes": screenshot_bytes,
+                "size": len(screenshot_bytes)
             }
             
         except Exception as e:
-            logger.error(f"Error taking screenshot: {str(e)}")
-            return {"format": "jpeg", "data": "", "size": 0}
+            logger.error("Error taking screenshot: %s", e)
+            return {"format": "jpeg", "bytes": b"", "size": 0}
     
     def get_current_url(self) -> str:
         if not self.is_initialized():
@@ -241,7 +368,7 @@ class BrowserController:
         try:
             return self.nova.page.url
         except Exception as e:
-            logger.error(f"Error getting current URL: {str(e)}")
+            logger.error("Error getting current URL: %s", e)
             return "Error getting URL"
     
     def get_page_title(self) -> str:
@@ -251,9 +378,56 @@ class BrowserController:
         try:
             return self.nova.page.title()
         except Exception as e:
-            logger.error(f"Error getting page title: {str(e)}")
+            logger.error("Error getting page title: %s", e)
             return "Error getting title"
     
+    def get_page_state(self) -> Tuple[str, str]:
+        """Return the current URL and page title with a single page evaluation"""
+        if not self.is_initialized():
+            return "Browser not initialized", "Browser not initialized"
+            
+        try:
+            info = self.nova.page.evaluate(_PAGE_INFO_SCRIPT)
+            return info['u'], info['t']
+        except Exception as e:
+            logger.error("Error getting page state: %s", e)
+            return "Error getting URL", "Error getting title"
+    
+    def capture_state(self, include_screenshot: bool = True) -> Dict[str, Any]:
+        """Return screenshot, URL and title of the current page in a single call"""
+        if not self.is_initialized():
+            return {"screenshot": {}, "current_url": "", "page_title": ""}
+        
+        screenshot_data = self.take_screenshot() if include_screenshot else {}
+        current_url, page_title = self.get_page_state()
+        return {"screenshot": screenshot_data, "current_url": current_url, "page_title": page_title}
+    
+    def evaluate_page_function(self, name: str, function_source: str, arg: Any = None) -> Any:
+        """Call a JS function that is compiled once per document
+        
+        The function is registered as an init script on first use, so every later
+        document gets it at load time and calls only ship its name. A document that
+        was already loaded before registration is patched on its first call.
+        
+        It is defined under a random per-browser name as a read-only, non-configurable
+        window property before any page script runs, so the page can neither find
+        nor replace it.
+        """
+        page = self.nova.page
+        key = self._page_functions.get(name)
+        if key is None:
+            key = f"__nova_{name}_{secrets.token_hex(8)}"
+            page.context.add_init_script(script=_define_page_function(key, function_source))
+            self._page_functions[name] = key
+        
+        # Probe and call in one round-trip; the flag tells a missing function from a null result
+        registered, *result = page.evaluate(
+            f"(arg) => typeof window.{key} === 'function' ? [true, window.{key}(arg)] : [false]", arg
+        )
+        if registered:
+            return result[0]
+        return page.evaluate(f"(arg) => {{ {_define_page_function(key, function_source)} return window.{key}(arg); }}", arg)
+    
     def get_page_content(self) -> str:
         if not self.is_initialized():
             return "Browser not initialized"
@@ -261,17 +435,25 @@ class BrowserController:
         try:
             return self.nova.page.content()
         except Exception as e:
-            logger.error(f"Error getting page content: {str(e)}")
+            logger.error("Error getting page content: %s", e)
             return "Error getting content"
     
 
+    def _kill_browser_group(self):
+        """Kill whatever is left of the browser's process group and stop tracking it"""
+        if self._browser_pgid is not None:
+            kill_process_groups([self._browser_pgid])
+            browser_process_groups.discard(self._browser_pgid)
+            self._browser_pgid = None
+    
     def close(self) -> bool:
         """Close browser and clean up all resources"""
         if not hasattr(self, 'nova') or self.nova is None:
             return True
         
+        self._initialized = False
         try:
-            logger.info(f"Closing browser instance for session {self.session_id}")
+            logger.info("Closing browser instance for session %s", self.session_id)
             
             # Step 1: Try to close gracefully via NovaAct's stop() method
             if hasattr(self.nova, 'stop'):
@@ -279,64 +461,28 @@ class BrowserController:
                     self.nova.stop()
                     logger.info("Browser stopped via nova.stop()")
                 except Exception as e:
-                    logger.warning(f"Error calling nova.stop(): {e}")
+                    logger.warning("Error calling nova.stop(): %s", e)
             
-            # Step 2: Force close any remaining browser processes
-            try:
-                import psutil
-                import os
-                
-                current_pid = os.getpid()
-                parent_process = psutil.Process(current_pid)
-                
-                # Find all Chrome/Chromium child processes
-                chrome_processes = []
-                for child in parent_process.children(recursive=True):
-                    try:
-                        if child.name().lower() in ['chrome', 'chromium', 'google chrome']:
-                            chrome_processes.append(child)
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
-                
-                # Terminate Chrome processes
-                for proc in chrome_processes:
-                    try:
-                        logger.info(f"Terminating Chrome process {proc.pid}")
-                        proc.terminate()
-                    except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                        logger.warning(f"Could not terminate process {proc.pid}: {e}")
-                
-                # Wait a bit and kill if still running
-                import time
-                time.sleep(0.5)
-                
-                for proc in chrome_processes:
-                    try:
-                        if proc.is_running():
-                            logger.warning(f"Force killing Chrome process {proc.pid}")
-                            proc.kill()
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
-                        
-            except ImportError:
-                logger.warning("psutil not available for process cleanup")
-            except Exception as e:
-                logger.error(f"Error in process cleanup: {e}")
+            # Step 2: Force close the rest of this session's browser; the process group
+            # holds its renderer and helper processes, so no process scan is needed
+            self._kill_browser_group()
             
             # Step 3: Clear the nova instance reference
             self.nova = None
+            self._viewport = None
+            self._page_functions.clear()
             
             # Step 4: Clean up session profile if using cloned profiles
             if self.session_id:
                 profile_manager.cleanup_session_profile(self.session_id)
             
-            # Step 5: Force garbage collection
-            import gc
-            gc.collect()
+            # Step 5: Force garbage collection (debug only, it stalls every thread)
+            if BROWSER_DEBUG_GC:
+                gc.collect()
             
-            logger.info(f"Browser resources cleaned up successfully for session {self.session_id}")
+            logger.info("Browser resources cleaned up successfully for session %s", self.session_id)
             return True
             
         except Exception as e:
-            logger.error(f"Error closing browser for session {self.session_id}: {e}")
+            logger.error("Error closing browser for session %s: %s", self.session_id, e)
             return False
\ No newline at end of file
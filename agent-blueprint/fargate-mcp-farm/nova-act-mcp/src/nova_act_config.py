@@ -4,6 +4,7 @@ Self-contained configuration for Docker deployment
 """
 
 import os
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 # Load environment variables from .env file (suppress warnings if not found)
@@ -28,6 +29,7 @@ BROWSER_USER_DATA_DIR = os.environ.get("NOVA_BROWSER_USER_DATA_DIR", "/tmp/nova_
 BROWSER_CLONE_USER_DATA = os.environ.get("NOVA_BROWSER_CLONE_USER_DATA", "True").lower() in ("true", "1", "yes")
 BROWSER_SCREENSHOT_QUALITY = int(os.environ.get("NOVA_BROWSER_SCREENSHOT_QUALITY", "70"))
 BROWSER_SCREENSHOT_MAX_WIDTH = int(os.environ.get("NOVA_BROWSER_SCREENSHOT_MAX_WIDTH", "800"))
+BROWSER_DEBUG_GC = os.environ.get("NOVA_DEBUG_GC", "False").lower() in ("true", "1", "yes")
 
 # MCP server settings
 MCP_SERVER_NAME = "nova-browser-automation"
@@ -36,9 +38,10 @@ MCP_TRANSPORT = os.environ.get("NOVA_MCP_TRANSPORT", "streamable-http")
 MCP_PORT = int(os.environ.get("NOVA_MCP_PORT", "8000"))
 MCP_HOST = os.environ.get("NOVA_MCP_HOST", "0.0.0.0")
 MCP_LOG_LEVEL = os.environ.get("NOVA_MCP_LOG_LEVEL", "INFO")
+MCP_MAX_SESSIONS = int(os.environ.get("NOVA_MCP_MAX_SESSIONS", "8"))  # Each session runs its own Chrome
 
-# Default browser settings
-DEFAULT_BROWSER_SETTINGS = {
+# Default browser settings, read-only since they are shared by every importer
+DEFAULT_BROWSER_SETTINGS = MappingProxyType({
     # Browser display settings
     "headless": BROWSER_HEADLESS,
     "start_url": BROWSER_START_URL,
@@ -63,7 +66,7 @@ DEFAULT_BROWSER_SETTINGS = {
     # Screenshot settings
     "screenshot_quality": BROWSER_SCREENSHOT_QUALITY,
     "screenshot_max_width": BROWSER_SCREENSHOT_MAX_WIDTH,
-}
+})
 
 # MCP server settings
 MCP_SERVER_SETTINGS = {
@@ -1,17 +1,43 @@
 import os
+import gc
 import sys
+import time
 import asyncio
 import logging
 import traceback
 import json
+import base64
 import signal
-import concurrent.futures
+import heapq
+import atexit
+import functools
+import threading
+from itertools import islice
+from collections import OrderedDict, deque
+from contextvars import ContextVar
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Union
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Tuple, Union
+from datetime import datetime
 from fastmcp import FastMCP
 
+# orjson is optional; it serializes tool response data several times faster than json
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def _json_size(obj) -> int:
+        return len(orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS))
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+    
+    def _json_size(obj) -> int:
+        # UTF-8 bytes, as orjson measures them, so size budgets do not depend on the backend
+        return len(_dumps(obj).encode())
+
 # Import these with try/except to handle different FastMCP versions
 try:
     from fastmcp.utilities.types import Image
@@ -28,19 +54,22 @@ except ImportError:
     # Fallback function
     def get_http_headers():
         return {}
-from browser_controller import BrowserController
-from nova_act_config import DEFAULT_BROWSER_SETTINGS
+from browser_controller import BrowserController, browser_process_groups, kill_process_groups
+from nova_act_config import DEFAULT_BROWSER_SETTINGS, MCP_MAX_SESSIONS
+
+# Static Nova Act limits, bound once for the tool handlers
+_DEFAULT_TIMEOUT = DEFAULT_BROWSER_SETTINGS["timeout"]
+_DEFAULT_MAX_STEPS = DEFAULT_BROWSER_SETTINGS["max_steps"]
 
 # Tool modules are organized below in sections:
 # 1. Nova Act Native Tools (High-level natural language)
 # 2. Playwright/JavaScript Tools (Low-level direct control)
 
 _session_thread_pools = {}  # Dict[session_id, ThreadPoolExecutor]
+_executor_freelist = deque()  # Idle single-thread executors kept warm for new sessions
 
 def create_fastmcp_response(status: str, message: str, screenshot_data: Dict[str, Any], additional_data: Dict[str, Any] = None) -> Union[List[Any], str]:
     """Create FastMCP response - return list with text and Image object"""
-    import base64
-    
     # Build response items
     response_items = []
     
@@ -49,13 +78,15 @@ def create_fastmcp_response(status: str, message: str, screenshot_data: Dict[str
     
     # Add additional data as JSON if provided
     if additional_data:
-        import json
-        response_items.append(json.dumps(additional_data, indent=2))
+        response_items.append(_dumps(additional_data))
     
     # Add image if screenshot is available
-    if screenshot_data and screenshot_data.get("data"):
+    if screenshot_data and (screenshot_data.get("bytes") or screenshot_data.get("data")):
         try:
-            image_bytes = base64.b64decode(screenshot_data["data"])
+            image_bytes = screenshot_data.get("bytes")
+            if not image_bytes:
+                # Legacy callers hand over base64 encoded data
+                image_bytes = base64.b64decode(screenshot_data["data"])
             
             # Create FastMCP Image object
             screenshot_image = Image(
@@ -64,10 +95,10 @@ def create_fastmcp_response(status: str, message: str, screenshot_data: Dict[str
             )
             response_items.append(screenshot_image)
             
-            print(f"📷 Created FastMCP response with Image object ({len(image_bytes)} bytes)")
+            logger.debug("Created FastMCP response with Image object (%d bytes)", len(image_bytes))
             
         except Exception as e:
-            print(f"❌ Failed to process screenshot: {e}")
+            logger.error("Failed to process screenshot: %s", e)
     
     # Return list of items for FastMCP to process
     return response_items
@@ -96,14 +127,22 @@ mcp = FastMCP("browser-automation")
 
 # Multiple browser controllers for different sessions (HTTP mode)
 _browser_controllers = {}  # Dict[session_id, BrowserController]
-_session_metadata = {}     # Dict[session_id, dict] - TTL and activity tracking
+_browser_lock = threading.Lock()  # Guards changes to _browser_controllers; reads need no lock
+_session_metadata = OrderedDict()  # Dict[session_id, dict] - TTL and activity tracking, least recently active first
 _shutdown_event = None
 _is_shutting_down = False
+_process_exiting = False  # Set when the process exits right after cleanup; the OS reclaims memory
+_expiry_heap = []          # (monotonic expires_at, session_id); at most one live entry per session
+_cleanup_wakeup = asyncio.Event()  # Wakes the cleanup task when an earlier expiry appears
+_closing_tasks = set()  # Background browser closes of expired and evicted sessions
 
 # Session management settings - hardcoded defaults
 SESSION_TTL_SECONDS = 600  # 10 minutes
-SESSION_CLEANUP_INTERVAL = 60  # 1 minute  
+SESSION_CLEANUP_INTERVAL = 60  # Retry delay after a failed cleanup pass
 DEFAULT_HEADLESS_MODE = True  # Default headless setting
+EXECUTOR_FREELIST_SIZE = 16  # Maximum idle session executors kept for reuse
+MAX_SESSIONS = MCP_MAX_SESSIONS  # NOVA_MCP_MAX_SESSIONS; evict the least recently active idle session beyond this
+GC_GEN0_THRESHOLD = 50000  # Allocations between young collections (CPython default: 700)
 
 # Screenshot streaming management - removed (not needed for basic MCP operation)
 
@@ -124,64 +163,147 @@ def _nova_thread_initializer():
     except Exception as e:
         logger.warning(f"Failed to initialize Nova Act thread: {e}")
 
+def _rename_session_thread(name: str):
+    """Give a reused executor thread the name of its new session"""
+    threading.current_thread().name = name
+
 def get_session_thread_pool(session_id: str) -> ThreadPoolExecutor:
     """Get or create a dedicated ThreadPoolExecutor for a specific session"""
     global _session_thread_pools
     
     if session_id not in _session_thread_pools:
-        _session_thread_pools[session_id] = ThreadPoolExecutor(
-            max_workers=1,  # Nova Act recommends single thread per session
-            thread_name_prefix=f"nova-session-{session_id}-",
-            initializer=_nova_thread_initializer
-        )
-        logger.info(f"Created dedicated ThreadPool for session {session_id}")
+        try:
+            # Reuse an idle executor whose thread and event loop are already running
+            executor = _executor_freelist.pop()
+            executor.submit(_rename_session_thread, f"nova-session-{session_id}-0")
+            logger.info("Reused idle ThreadPool for session %s", session_id)
+        except IndexError:
+            executor = ThreadPoolExecutor(
+                max_workers=1,  # Nova Act recommends single thread per session
+                thread_name_prefix=f"nova-session-{session_id}-",
+                initializer=_nova_thread_initializer
+            )
+            logger.info("Created dedicated ThreadPool for session %s", session_id)
+        _session_thread_pools[session_id] = executor
     
     return _session_thread_pools[session_id]
 
+def _recycle_executor(executor: ThreadPoolExecutor):
+    """Put a drained executor on the idle list, unless the server is shutting down meanwhile"""
+    if _is_shutting_down:
+        executor.shutdown(wait=False)
+    else:
+        _executor_freelist.append(executor)
+
 def shutdown_session_thread_pool(session_id: str):
-    """Shutdown ThreadPoolExecutor for a specific session"""
+    """Release the ThreadPoolExecutor of a specific session"""
     global _session_thread_pools
     
     if session_id in _session_thread_pools:
-        executor = _session_thread_pools[session_id]
-        executor.shutdown(wait=True)
-        del _session_thread_pools[session_id]
-        logger.info(f"Shut down ThreadPool for session {session_id}")
+        executor = _session_thread_pools.pop(session_id)
+        if not _is_shutting_down and len(_executor_freelist) < EXECUTOR_FREELIST_SIZE:
+            # Keep the thread alive for the next session instead of joining it, but only
+            # once the work already queued on it has drained
+            executor.submit(_rename_session_thread, "nova-session-idle").add_done_callback(
+                lambda _: _recycle_executor(executor))
+            logger.info(f"Returning ThreadPool of session {session_id} to the idle pool")
+        else:
+            # The worker exits after its queued work; joining it here would block the event loop
+            executor.shutdown(wait=False)
+            logger.info(f"Shut down ThreadPool for session {session_id}")
+
+def _shutdown_executors(executors: List[ThreadPoolExecutor], wait: bool = True):
+    """Shutdown executors concurrently: total wait is the slowest drain, not the sum"""
+    # Stop all of them first so their queued work drains in parallel, then join
+    for executor in executors:
+        executor.shutdown(wait=False)
+    if wait:
+        for executor in executors:
+            executor.shutdown(wait=True)
 
-def shutdown_all_session_thread_pools():
-    """Shutdown all session ThreadPoolExecutors"""
+def drain_executor_freelist():
+    """Shutdown all idle session ThreadPoolExecutors"""
+    executors = list(_executor_freelist)
+    _executor_freelist.clear()
+    _shutdown_executors(executors)
+
+def shutdown_all_session_thread_pools(wait: bool = True):
+    """Shutdown all session ThreadPoolExecutors; with wait=False their threads are not joined"""
     global _session_thread_pools
     
-    for session_id in list(_session_thread_pools.keys()):
-        shutdown_session_thread_pool(session_id)
+    executors = list(_session_thread_pools.values()) + list(_executor_freelist)
+    _session_thread_pools.clear()
+    _executor_freelist.clear()
+    _shutdown_executors(executors, wait=wait)
+    if executors:
+        logger.info("Shut down %d session ThreadPools", len(executors))
+
+atexit.register(drain_executor_freelist)
 
 def update_session_activity(session_id: str, headless: bool = None):
     """Update the last activity timestamp for a session"""
     global _session_metadata
     
-    now = datetime.now()
-    if session_id not in _session_metadata:
+    now = time.monotonic()  # TTL accounting is immune to wall-clock jumps
+    metadata = _session_metadata.get(session_id)
+    if metadata is None:
+        # Make room before admitting a new session so a burst cannot outgrow the TTL cleanup;
+        # a session with a call in flight is never evicted
+        excess = len(_session_metadata) - MAX_SESSIONS + 1
+        if excess > 0:
+            idle_sessions = list(islice(
+                (sid for sid, meta in _session_metadata.items() if not meta['in_flight']), excess))
+            for idle_session_id in idle_sessions:
+                _close_session(idle_session_id, "evicted (session limit reached)")
+            if len(idle_sessions) < excess:
+                logger.warning("Session limit %d exceeded: all sessions have calls in flight", MAX_SESSIONS)
+        
         # Use hardcoded default headless setting if not specified
-        _session_metadata[session_id] = {
-            'created_at': now,
+        metadata = _session_metadata[session_id] = {
+            'created_at': datetime.now(),
             'last_activity': now,
             'request_count': 0,
+            'in_flight': 0,  # Calls running or queued on the session thread
+            'expiry_check': None,  # Time of the session's pending _expiry_heap entry
             'ttl_seconds': SESSION_TTL_SECONDS,
             'headless': headless if headless is not None else DEFAULT_HEADLESS_MODE
         }
     else:
+        _session_metadata.move_to_end(session_id)
         # Update headless setting if provided
-        if headless is not None:
-            _session_metadata[session_id]['headless'] = headless
-    
-    _session_metadata[session_id]['last_activity'] = now
-    _session_metadata[session_id]['request_count'] += 1
-    logger.debug(f"Updated activity for session {session_id}, headless: {_session_metadata[session_id]['headless']}")
+        if headless is not None and metadata['headless'] != headless:
+            metadata['headless'] = headless
+    
+    # Only called from the event loop thread, so these updates never interleave
+    metadata['last_activity'] = now
+    metadata['request_count'] += 1
+    
+    # Schedule one expiry check per session; when it comes due the cleanup pass moves it
+    # to the expiry implied by the latest activity, so the heap never outgrows the sessions
+    if metadata['expiry_check'] is None:
+        _schedule_expiry_check(session_id, metadata, now + metadata['ttl_seconds'])
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Updated activity for session %s, headless: %s", session_id, metadata['headless'])
 
-def get_or_create_browser(session_id: str, headless: bool = None) -> BrowserController:
+def _schedule_expiry_check(session_id: str, metadata: Dict[str, Any], check_at: float):
+    """Push the session's expiry check; only an entry that becomes the earliest wakes the cleanup task"""
+    metadata['expiry_check'] = check_at
+    entry = (check_at, session_id)
+    heapq.heappush(_expiry_heap, entry)
+    if _expiry_heap[0] is entry:
+        _cleanup_wakeup.set()
+
+def get_or_create_browser(session_id: str = None, headless: bool = None) -> BrowserController:
     """Get existing browser controller or create new one for session"""
     global _browser_controllers
     
+    if _is_shutting_down:
+        return None
+    
+    # Get session_id from context if not provided
+    if not session_id:
+        session_id = get_session_id_from_context()
+    
     # Try to get headless setting from headers if not explicitly provided
     if headless is None:
         headless = get_headless_from_headers()
@@ -189,19 +311,15 @@ def get_or_create_browser(session_id: str, headless: bool = None) -> BrowserCont
     # Update session activity and headless setting
     update_session_activity(session_id, headless)
     
-    # Check if browser exists and is initialized
-    if session_id in _browser_controllers:
-        browser = _browser_controllers[session_id]
-        if browser and browser.is_initialized():
-            logger.debug(f"Using existing browser for session {session_id}")
-            return browser
+    # A controller that is not initialized is reused as well: initialize_browser()
+    # stops any previous Nova Act instance, whereas replacing the controller leaked it
+    with _browser_lock:
+        browser = _browser_controllers.get(session_id)
+        if browser is None:
+            browser = _browser_controllers[session_id] = BrowserController(session_id=session_id)
+            logger.info("Created new browser controller for session %s", session_id)
         else:
-            logger.info(f"Browser for session {session_id} not initialized, creating new one")
-    
-    # Create new browser controller
-    browser = BrowserController(session_id=session_id)
-    _browser_controllers[session_id] = browser
-    logger.info(f"Created new browser controller for session {session_id}")
+            logger.debug("Using existing browser controller for session %s", session_id)
     
     return browser
 
@@ -212,69 +330,126 @@ def get_session_headless_setting(session_id: str) -> bool:
         return _session_metadata[session_id].get('headless', DEFAULT_HEADLESS_MODE)
     return DEFAULT_HEADLESS_MODE
 
-def _calculate_element_relevance_score(element: Dict[str, Any], keywords: List[str]) -> int:
-    """Calculate relevance score for an element based on keywords"""
-    score = 0
-    
+def _index_element(element: Dict[str, Any]) -> Tuple[str, Tuple[str, ...], Dict[str, int], Tuple[str, ...], str, int]:
+    """Lowercase the searchable strings of an element once so it can be scored against any keywords"""
     # Extract searchable text from element
     searchable_texts = []
     
     # Text content
     text_content = element.get('text', {})
-    if text_content.get('content'):
-        searchable_texts.append(text_content['content'].lower())
-    if text_content.get('label'):
-        searchable_texts.append(text_content['label'].lower())
-    if text_content.get('placeholder'):
-        searchable_texts.append(text_content['placeholder'].lower())
+    for key in ('content', 'label', 'placeholder'):
+        if text_content.get(key):
+            searchable_texts.append(text_content[key].lower())
     
     # Attributes
     attributes = element.get('attributes', {})
-    for attr_key, attr_value in attributes.items():
+    for attr_value in attributes.values():
         if attr_value and isinstance(attr_value, str):
             searchable_texts.append(attr_value.lower())
     
     # Selectors (class names, IDs)
     selectors = element.get('selectors', {})
-    for selector_type, selector_value in selectors.items():
+    for selector_value in selectors.values():
         if selector_value and isinstance(selector_value, str):
             searchable_texts.append(selector_value.lower())
     
-    # Score calculation
-    for keyword in keywords:
-        keyword_lower = keyword.lower()
-        
-        for text in searchable_texts:
-            if keyword_lower in text:
-                # Exact match gets higher score
-                if keyword_lower == text.strip():
-                    score += 10
-                # Partial match in ID or class gets high score
-                elif any(keyword_lower in attr.lower() for attr in [
-                    attributes.get('id', ''), 
-                    attributes.get('class', ''),
-                    attributes.get('name', '')
-                ] if attr):
-                    score += 8
-                # Partial match in text content
-                elif keyword_lower in text_content.get('content', '').lower():
-                    score += 6
-                # Partial match in other text
-                else:
-                    score += 3
+    # Number of texts that equal a keyword exactly
+    exact_counts = {}
+    for text in searchable_texts:
+        stripped = text.strip()
+        exact_counts[stripped] = exact_counts.get(stripped, 0) + 1
+    
+    id_class_name = tuple(
+        attr.lower() for attr in (attributes.get('id', ''), attributes.get('class', ''), attributes.get('name', '')) if attr
+    )
+    content = (text_content.get('content') or '').lower()
     
     # Element type bonuses
+    bonus = 0
     tag = element.get('tag', '').lower()
     if tag in ['button', 'input', 'select', 'a']:
-        score += 2  # Interactive elements get slight bonus
+        bonus += 2  # Interactive elements get slight bonus
     
     # Visibility bonus
     state = element.get('state', {})
     if state.get('visible', False):
-        score += 1
+        bonus += 1
+    
+    # All texts in one string so keywords that match nothing are rejected with a single scan
+    haystack = '\0'.join(searchable_texts)
+    
+    return haystack, tuple(searchable_texts), exact_counts, id_class_name, content, bonus
+
+def _score_indexed_element(indexed_element, keywords_lower: Tuple[str, ...]) -> int:
+    """Score an element prepared by _index_element against lowercased keywords"""
+    haystack, searchable_texts, exact_counts, id_class_name, content, score = indexed_element
+    
+    for keyword in keywords_lower:
+        if keyword not in haystack:
+            continue
+        matches = sum(1 for text in searchable_texts if keyword in text)
+        if not matches:
+            continue
+        
+        # Exact match gets higher score
+        exact = exact_counts.get(keyword, 0)
+        # Partial match in ID or class gets high score
+        if any(keyword in attr for attr in id_class_name):
+            partial = 8
+        # Partial match in text content
+        elif keyword in content:
+            partial = 6
+        # Partial match in other text
+        else:
+            partial = 3
+        score += 10 * exact + partial * (matches - exact)
     
     return score
 
+def _calculate_element_relevance_score(element: Dict[str, Any], keywords: List[str]) -> int:
+    """Calculate relevance score for an element based on keywords"""
+    return _score_indexed_element(_index_element(element), tuple(keyword.lower() for keyword in keywords))
+
+async def _close_browser_in_session_thread(session_id: str, browser: BrowserController):
+    """Close a dropped session's browser on its own thread, then release the thread pool"""
+    try:
+        await run_in_session_thread(session_id, browser.close)
+        logger.info(f"Closed browser for session {session_id}")
+    except Exception as e:
+        logger.error(f"Error closing browser for session {session_id}: {e}")
+    
+    # A session that came back meanwhile queued its calls behind the close; keep its thread
+    if session_id not in _session_metadata:
+        try:
+            shutdown_session_thread_pool(session_id)
+        except Exception as e:
+            logger.error(f"Error shutting down thread pool for session {session_id}: {e}")
+    
+    # Closed controllers leave many young wrapper objects behind; collect them
+    # here, between requests, rather than in the middle of one
+    gc.collect(1)
+
+def _close_session(session_id: str, reason: str):
+    """Drop the metadata and browser of a session and close the browser in the background"""
+    logger.info(f"Session {session_id} {reason}, cleaning up")
+    
+    # Only the removal needs the lock; closing takes seconds and runs on the session
+    # thread, which Playwright requires and which keeps the event loop serving
+    with _browser_lock:
+        browser = _browser_controllers.pop(session_id, None)
+    _session_metadata.pop(session_id, None)
+    
+    if browser is None:
+        try:
+            shutdown_session_thread_pool(session_id)
+        except Exception as e:
+            logger.error(f"Error shutting down thread pool for session {session_id}: {e}")
+        return
+    
+    task = asyncio.get_running_loop().create_task(_close_browser_in_session_thread(session_id, browser))
+    _closing_tasks.add(task)
+    task.add_done_callback(_closing_tasks.discard)
+
 def cleanup_expired_sessions():
     """Clean up expired sessions based on TTL"""
     global _browser_controllers, _session_metadata
@@ -282,40 +457,29 @@ def cleanup_expired_sessions():
     if _is_shutting_down:
         return
     
-    now = datetime.now()
-    expired_sessions = []
-    
-    for session_id, metadata in _session_metadata.items():
-        last_activity = metadata['last_activity']
-        ttl_seconds = metadata['ttl_seconds']
-        
-        if now - last_activity > timedelta(seconds=ttl_seconds):
-            expired_sessions.append(session_id)
+    now = time.monotonic()  # One snapshot for the whole pass
+    expired_sessions = {}   # Insertion-ordered set of session IDs
+    
+    # Only sessions whose scheduled expiry has passed can have expired
+    while _expiry_heap and _expiry_heap[0][0] <= now:
+        check_at, session_id = heapq.heappop(_expiry_heap)
+        metadata = _session_metadata.get(session_id)
+        # Skip entries of closed sessions, including those of an earlier session with the same ID
+        if metadata is None or metadata['expiry_check'] != check_at:
+            continue
+        
+        expires_at = metadata['last_activity'] + metadata['ttl_seconds']
+        if metadata['in_flight']:
+            # Still working on a long call; check again one TTL from now
+            _schedule_expiry_check(session_id, metadata, now + metadata['ttl_seconds'])
+        elif expires_at > now:
+            # Active since the check was scheduled
+            _schedule_expiry_check(session_id, metadata, expires_at)
+        else:
+            expired_sessions[session_id] = None
     
     for session_id in expired_sessions:
-        logger.info(f"Session {session_id} expired, cleaning up")
-        
-        
-        # Close browser if exists
-        if session_id in _browser_controllers:
-            try:
-                browser = _browser_controllers[session_id]
-                if browser:
-                    browser.close()
-                del _browser_controllers[session_id]
-                logger.info(f"Closed expired browser for session {session_id}")
-            except Exception as e:
-                logger.error(f"Error closing expired browser for session {session_id}: {e}")
-        
-        # Shutdown thread pool
-        try:
-            shutdown_session_thread_pool(session_id)
-        except Exception as e:
-            logger.error(f"Error shutting down thread pool for session {session_id}: {e}")
-        
-        # Remove metadata
-        if session_id in _session_metadata:
-            del _session_metadata[session_id]
+        _close_session(session_id, "expired")
     
     if expired_sessions:
         logger.info(f"Cleaned up {len(expired_sessions)} expired sessions")
@@ -325,7 +489,16 @@ async def session_cleanup_task():
     while not _is_shutting_down:
         try:
             cleanup_expired_sessions()
-            await asyncio.sleep(SESSION_CLEANUP_INTERVAL)
+            
+            # Sleep until the earliest scheduled expiry, or until activity schedules one
+            _cleanup_wakeup.clear()
+            timeout = None
+            if _expiry_heap:
+                timeout = max(0.0, _expiry_heap[0][0] - time.monotonic())
+            try:
+                await asyncio.wait_for(_cleanup_wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
         except Exception as e:
             logger.error(f"Error in session cleanup task: {e}")
             await asyncio.sleep(SESSION_CLEANUP_INTERVAL)
@@ -340,8 +513,18 @@ async def run_in_session_thread(session_id: str, func, *args, **kwargs):
     def wrapper():
         return func(*args, **kwargs)
     
-    logger.debug(f"Executing {func.__name__} in session {session_id} thread")
-    return await loop.run_in_executor(executor, wrapper)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Executing %s in session %s thread", func.__name__, session_id)
+    
+    # Keep the session from being evicted or expired while the call is running
+    metadata = _session_metadata.get(session_id)
+    if metadata is not None:
+        metadata['in_flight'] += 1
+    try:
+        return await loop.run_in_executor(executor, wrapper)
+    finally:
+        if metadata is not None:
+            metadata['in_flight'] -= 1
 
 def format_log_response(response_data):
     if isinstance(response_data, dict):
@@ -353,21 +536,48 @@ def format_log_response(response_data):
             simplified["current_url"] = response_data["current_url"]
         if "page_title" in response_data:
             simplified["page_title"] = response_data["page_title"]
-        return json.dumps(simplified)
+        return _dumps(simplified)
     return str(response_data)
 
-def get_session_id_from_context() -> str:
-    """Extract session ID from current context"""
-    try:
+_headers_ctx: ContextVar[Optional[Dict[str, str]]] = ContextVar("headers", default=None)
+_session_id_ctx: ContextVar[Optional[str]] = ContextVar("session_id", default=None)
+
+def _get_request_headers() -> Dict[str, str]:
+    """Return the HTTP headers of the current tool call (FastMCP lowercases the names)"""
+    headers = _headers_ctx.get()
+    if headers is None:
         headers = get_http_headers()
-        session_id = headers.get("x-session-id") or headers.get("X-Session-ID")
+    return headers
+
+def with_request_context(func):
+    """Resolve the HTTP headers and session ID once per tool call and share them with the helpers"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            headers = get_http_headers()
+        except Exception:
+            headers = None  # Helpers retry and report the error themselves
+        headers_token = _headers_ctx.set(headers)
+        session_token = _session_id_ctx.set(_resolve_session_id())
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _session_id_ctx.reset(session_token)
+            _headers_ctx.reset(headers_token)
+    return wrapper
+
+def _resolve_session_id() -> str:
+    """Extract session ID from the request headers or the environment"""
+    try:
+        headers = _get_request_headers()
+        session_id = headers.get("x-session-id")
         if session_id:
-            logger.debug(f"Got session ID from HTTP header: {session_id}")
+            logger.debug("Got session ID from HTTP header: %s", session_id)
             return session_id
         else:
-            logger.warning(f"No session ID in headers. Available headers: {list(headers.keys())}")
+            logger.warning("No session ID in headers. Available headers: %s", list(headers))
     except Exception as e:
-        logger.warning(f"Failed to get HTTP headers: {e}")
+        logger.warning("Failed to get HTTP headers: %s", e)
         # Not in HTTP context, try environment variable
         session_id = os.environ.get("BROWSER_SESSION_ID")
         if session_id:
@@ -376,39 +586,24 @@ def get_session_id_from_context() -> str:
     logger.warning("No session ID provided - using default session")
     return "default"
 
+def get_session_id_from_context() -> str:
+    """Extract session ID from current context"""
+    return _session_id_ctx.get() or _resolve_session_id()
+
 def get_headless_from_headers() -> bool:
     """Extract headless setting from HTTP headers"""
     try:
-        headers = get_http_headers()
-        headless_header = headers.get("x-browser-headless") or headers.get("X-Browser-Headless")
+        headers = _get_request_headers()
+        headless_header = headers.get("x-browser-headless")
         if headless_header:
             headless_value = headless_header.lower() in ("true", "1", "yes")
-            logger.debug(f"Got headless setting from HTTP header: {headless_value}")
+            logger.debug("Got headless setting from HTTP header: %s", headless_value)
             return headless_value
     except Exception as e:
-        logger.debug(f"No headless header found or error reading headers: {e}")
+        logger.debug("No headless header found or error reading headers: %s", e)
     
     return None  # No header provided
 
-def get_browser_controller(session_id: str = None) -> BrowserController:
-    global _browser_controllers
-    
-    if _is_shutting_down:
-        return None
-    
-    # Get session_id from context if not provided
-    if not session_id:
-        session_id = get_session_id_from_context()
-    
-    # Create or get controller for this session
-    if session_id not in _browser_controllers:
-        logger.info(f"Creating new browser controller for session: {session_id}")
-        _browser_controllers[session_id] = BrowserController(session_id=session_id)
-    else:
-        logger.debug(f"Reusing existing browser controller for session: {session_id}")
-    
-    return _browser_controllers[session_id]
-
 def create_error_response(e: Exception, context: str) -> Dict[str, Any]:
     logger.error(f"Error in {context}: {str(e)}")
     return {
@@ -421,6 +616,7 @@ def create_error_response(e: Exception, context: str) -> Dict[str, Any]:
 # ============================================================================
 
 @mcp.tool()
+@with_request_context
 async def navigate(url: str) -> Union[Dict[str, Any], Image]:
     """
     Navigate browser to a specified URL. Browser will be automatically initialized if needed.
@@ -433,29 +629,23 @@ async def navigate(url: str) -> Union[Dict[str, Any], Image]:
         session_id = get_session_id_from_context()
         browser = get_or_create_browser(session_id)
         
-        # Auto-initialize browser if not already initialized
-        if not await run_in_session_thread(session_id, browser.is_initialized):
-            session_headless = get_session_headless_setting(session_id)
-            logger.info(f"Auto-initializing browser for session {session_id} (headless: {session_headless})")
-            init_result = await run_in_session_thread(
-                session_id, 
-                browser.initialize_browser, 
-                headless=session_headless,
-                starting_url=url
-            )
-            if not init_result[0]:  # initialization failed
-                return {"status": "error", "message": f"Failed to initialize browser: {init_result[2]}"}
-        
-        result = await run_in_session_thread(session_id, browser.go_to_url, url)
+        # Auto-initialize browser if not already initialized, then navigate in the same thread hop
+        success, result = await run_in_session_thread(
+            session_id,
+            browser.ensure_initialized_and_goto,
+            url,
+            headless=get_session_headless_setting(session_id)
+        )
+        if not success:  # initialization failed
+            return {"status": "error", "message": f"Failed to initialize browser: {result}"}
         
         # Create lightweight response without full base64 screenshot data
         screenshot_data = result.get("screenshot", {})
-        page_title = await run_in_session_thread(session_id, browser.get_page_title)
         message = f"Navigated to {url}"
         
         additional_data = {
             "current_url": result["current_url"],
-            "page_title": page_title
+            "page_title": result["page_title"]
         }
         
         # Create response with text and separate image
@@ -465,6 +655,7 @@ async def navigate(url: str) -> Union[Dict[str, Any], Image]:
         return create_error_response(e, "navigate to URL")
 
 @mcp.tool()
+@with_request_context
 async def act(instruction: str) -> Union[Dict[str, Any], Image]:
     """
     Execute browser actions using natural language instructions focused on visible elements.
@@ -496,33 +687,24 @@ async def act(instruction: str) -> Union[Dict[str, Any], Image]:
         session_id = get_session_id_from_context()
         browser = get_or_create_browser(session_id)
         
-        # Auto-initialize browser if not already initialized
-        if not await run_in_session_thread(session_id, browser.is_initialized):
-            session_headless = get_session_headless_setting(session_id)
-            logger.info(f"Auto-initializing browser for session {session_id} (headless: {session_headless})")
-            init_result = await run_in_session_thread(
-                session_id, 
-                browser.initialize_browser, 
-                headless=session_headless
-            )
-            if not init_result[0]:  # initialization failed
-                return {"status": "error", "message": f"Failed to initialize browser: {init_result[2]}"}
-        
         # Always use 3 steps for focused tasks
         max_steps = 3
-        timeout = DEFAULT_BROWSER_SETTINGS.get("timeout", 300)
+        timeout = _DEFAULT_TIMEOUT
         
-        result = await run_in_session_thread(
+        # Auto-initialize browser if not already initialized, then act in the same thread hop
+        success, result = await run_in_session_thread(
             session_id,
-            browser.execute_action, 
+            browser.ensure_initialized_and_act,
             instruction,
-            max_steps=max_steps, 
+            headless=get_session_headless_setting(session_id),
+            max_steps=max_steps,
             timeout=timeout
         )
+        if not success:  # initialization failed
+            return {"status": "error", "message": f"Failed to initialize browser: {result}"}
         
-        screenshot_data = await run_in_session_thread(session_id, browser.take_screenshot)
-        current_url = await run_in_session_thread(session_id, browser.get_current_url)
-        page_title = await run_in_session_thread(session_id, browser.get_page_title)
+        state = await run_in_session_thread(session_id, browser.capture_state)
+        screenshot_data, current_url, page_title = state["screenshot"], state["current_url"], state["page_title"]
         
         # Add URL to screenshot data for reference
         if screenshot_data:
@@ -548,11 +730,9 @@ async def act(instruction: str) -> Union[Dict[str, Any], Image]:
         
         try:
             session_id = get_session_id_from_context()
-            browser = get_browser_controller(session_id)
-            if await run_in_session_thread(session_id, browser.is_initialized):
-                screenshot_data = await run_in_session_thread(session_id, browser.take_screenshot)
-                current_url = await run_in_session_thread(session_id, browser.get_current_url)
-                page_title = await run_in_session_thread(session_id, browser.get_page_title)
+            browser = _browser_controllers.get(session_id)
+            state = await run_in_session_thread(session_id, browser.capture_state)
+            screenshot_data, current_url, page_title = state["screenshot"], state["current_url"], state["page_title"]
         except:
             pass
             
@@ -574,7 +754,87 @@ async def act(instruction: str) -> Union[Dict[str, Any], Image]:
         
         return create_error_response(e, f"perform action: {instruction}")
 
+# Built-in extract schemas, shared across calls (treat as read-only)
+_EXTRACT_SCHEMAS = {
+    # Basic product schema
+    "product": {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "price": {"type": "string"},
+            "description": {"type": "string"},
+            "availability": {"type": "string"}
+        }
+    },
+    # Basic search result schema
+    "search_result": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "title": {"type": "string"},
+                        "url": {"type": "string"},
+                        "description": {"type": "string"}
+                    }
+                }
+            }
+        }
+    },
+    # Basic form fields schema
+    "form": {
+        "type": "object",
+        "properties": {
+            "fields": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "type": {"type": "string"},
+                        "value": {"type": "string"},
+                        "required": {"type": "boolean"}
+                    }
+                }
+            }
+        }
+    },
+    # Basic navigation schema
+    "navigation": {
+        "type": "object",
+        "properties": {
+            "links": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "text": {"type": "string"},
+                        "url": {"type": "string"}
+                    }
+                }
+            },
+            "current_page": {"type": "string"}
+        }
+    },
+    # Basic boolean schema
+    "bool": {
+        "type": "object",
+        "properties": {
+            "result": {"type": "boolean"},
+            "details": {"type": "string"}
+        }
+    },
+}
+
+@functools.lru_cache(maxsize=128)
+def _parse_custom_schema(custom_schema: str) -> Dict[str, Any]:
+    """Parse a custom extract schema; clients tend to resend the same one"""
+    return json.loads(custom_schema)
+
 @mcp.tool()
+@with_request_context
 async def extract(
     description: str,
     schema_type: str = "bool",
@@ -597,12 +857,11 @@ async def extract(
     """
     try:
         session_id = get_session_id_from_context()
-        browser = get_browser_controller(session_id)
+        browser = get_or_create_browser(session_id)
         
         if not await run_in_session_thread(session_id, browser.is_initialized):
             return {"status": "error", "message": "Browser not initialized"}
         
-        schema = None
         if schema_type == "custom":
             if not custom_schema:
                 return {
@@ -610,88 +869,15 @@ async def extract(
                     "message": "custom_schema parameter is required when schema_type is 'custom'"
                 }
             try:
-                schema = json.loads(custom_schema)
+                schema = _parse_custom_schema(custom_schema)
             except json.JSONDecodeError as e:
                 return {
                     "status": "error",
                     "message": f"Invalid JSON in custom_schema: {str(e)}"
                 }
-        elif schema_type == "product":
-            # Basic product schema
-            schema = {
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string"},
-                    "price": {"type": "string"},
-                    "description": {"type": "string"},
-                    "availability": {"type": "string"}
-                }
-            }
-        elif schema_type == "search_result":
-            # Basic search result schema
-            schema = {
-                "type": "object",
-                "properties": {
-                    "results": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "title": {"type": "string"},
-                                "url": {"type": "string"},
-                                "description": {"type": "string"}
-                            }
-                        }
-                    }
-                }
-            }
-        elif schema_type == "form":
-            # Basic form fields schema
-            schema = {
-                "type": "object",
-                "properties": {
-                    "fields": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "name": {"type": "string"},
-                                "type": {"type": "string"},
-                                "value": {"type": "string"},
-                                "required": {"type": "boolean"}
-                            }
-                        }
-                    }
-                }
-            }
-        elif schema_type == "navigation":
-            # Basic navigation schema
-            schema = {
-                "type": "object",
-                "properties": {
-                    "links": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "text": {"type": "string"},
-                                "url": {"type": "string"}
-                            }
-                        }
-                    },
-                    "current_page": {"type": "string"}
-                }
-            }
-        elif schema_type == "bool":
-            # Basic boolean schema
-            schema = {
-                "type": "object",
-                "properties": {
-                    "result": {"type": "boolean"},
-                    "details": {"type": "string"}
-                }
-            }
-        elif schema_type not in ["bool", "product", "search_result", "form", "navigation", "custom"]:
+        elif schema_type in _EXTRACT_SCHEMAS:
+            schema = _EXTRACT_SCHEMAS[schema_type]
+        else:
             return {
                 "status": "error",
                 "message": f"Invalid schema_type: {schema_type}. Valid options: bool, product, search_result, form, navigation, custom"
@@ -699,8 +885,8 @@ async def extract(
         
         prompt = f"{description} from the current webpage"
         
-        max_steps = DEFAULT_BROWSER_SETTINGS.get("max_steps", 30)
-        timeout = DEFAULT_BROWSER_SETTINGS.get("timeout", 300)
+        max_steps = _DEFAULT_MAX_STEPS
+        timeout = _DEFAULT_TIMEOUT
         
         result = await run_in_session_thread(
             session_id,
@@ -711,9 +897,8 @@ async def extract(
             timeout=timeout
         )
         
-        screenshot_data = await run_in_session_thread(session_id, browser.take_screenshot)
-        current_url = await run_in_session_thread(session_id, browser.get_current_url)
-        page_title = await run_in_session_thread(session_id, browser.get_page_title)
+        state = await run_in_session_thread(session_id, browser.capture_state)
+        screenshot_data, current_url, page_title = state["screenshot"], state["current_url"], state["page_title"]
         
         # Add URL to screenshot data for reference
         if screenshot_data:
@@ -739,7 +924,8 @@ async def extract(
 # ============================================================================
 
 @mcp.tool()
-async def get_page_structure(focus_keywords: Optional[str] = None) -> Union[Dict[str, Any], Image]:
+@with_request_context
+async def get_page_structure(focus_keywords: Optional[str] = None, include_hidden: bool = False) -> Union[Dict[str, Any], Image]:
     """
     Get detailed structure of the current page including all interactive elements with their properties.
     This provides comprehensive information needed for precise browser automation.
@@ -748,6 +934,10 @@ async def get_page_structure(focus_keywords: Optional[str] = None) -> Union[Dict
         focus_keywords: Optional comma-separated keywords (max 10) to focus on when page structure is too large.
                        Examples: "search,filter,sort" or "checkout,cart,payment" or "login,signup,account"
                        The filtered elements will retain all necessary information for JavaScript execution and quick_action.
+        include_hidden: Also report elements that take up no space on the page (collapsed menus, hidden inputs).
+                       Defaults to False since only rendered elements can be acted on.
+                       The interactable_summary counts and forms always cover the whole document;
+                       form fields only list refs that appear in elements.
     
     Returns detailed page structure with elements, selectors, states, and bounding boxes.
     When structure is too large, prioritizes elements matching focus_keywords.
@@ -756,47 +946,47 @@ async def get_page_structure(focus_keywords: Optional[str] = None) -> Union[Dict
         session_id = get_session_id_from_context()
         browser = get_or_create_browser(session_id)
         
-        # Ensure browser is initialized
-        if not await run_in_session_thread(session_id, browser.is_initialized):
-            initialize_result = await run_in_session_thread(
-                session_id, browser.initialize_browser, True, None
-            )
-            if not initialize_result[0]:
-                return {
-                    "status": "error",
-                    "message": "Failed to initialize browser"
-                }
-        
         # Get page structure using JavaScript evaluation
         structure_script = """
-        () => {
+        (options) => {
+            const includeHidden = !!(options && options.includeHidden);
             const elements = [];
             const forms = [];
             
             // Helper function to generate unique ref
-            function generateRef(element, index) {
-                return `ref-${element.tagName.toLowerCase()}-${index}`;
+            function generateRef(tag, index) {
+                return `ref-${tag}-${index}`;
+            }
+            
+            // Helper function to get the leading text of an element without copying
+            // the text of large subtrees more than once
+            function shortText(element) {
+                if (element.childNodes.length === 1 && element.firstChild.nodeType === 3) {
+                    return element.firstChild.nodeValue.trim().slice(0, 100);
+                }
+                const tc = element.textContent;
+                return tc ? tc.trimStart().slice(0, 100).trimEnd() : '';
             }
             
             // Helper function to get element selectors
-            function getSelectors(element) {
+            function getSelectors(element, tag, id, ariaLabel, content) {
                 const selectors = {};
                 
                 // CSS selector
-                if (element.id) {
-                    selectors.css = `#${element.id}`;
-                } else if (element.className) {
-                    selectors.css = `.${element.className.split(' ')[0]}`;
+                if (id) {
+                    selectors.css = `#${id}`;
+                } else if (element.classList.length) {
+                    selectors.css = `.${element.classList[0]}`;
                 } else {
-                    selectors.css = element.tagName.toLowerCase();
+                    selectors.css = tag;
                 }
                 
                 // XPath
                 selectors.xpath = getElementXPath(element);
                 
                 // ARIA
-                const role = element.getAttribute('role') || element.tagName.toLowerCase();
-                const name = element.getAttribute('aria-label') || element.getAttribute('name') || element.textContent.trim().substring(0, 50);
+                const role = element.getAttribute('role') || tag;
+                const name = ariaLabel || element.getAttribute('name') || content.substring(0, 50);
                 if (name) {
                     selectors.aria = `${role}[name='${name}']`;
                 }
@@ -805,30 +995,50 @@ async def get_page_structure(focus_keywords: Optional[str] = None) -> Union[Dict
             }
             
             // Helper function to get XPath
+            // Walks up iteratively and caches the path of every ancestor it visits,
+            // so elements sharing ancestors only compute the new segments
+            const xpathCache = new Map();
             function getElementXPath(element) {
-                if (element.id !== '') {
-                    return `//*[@id="${element.id}"]`;
-                }
-                if (element === document.body) {
-                    return '//body';
-                }
+                const nodes = [];
+                const parts = [];
+                let path = '';
                 
-                let ix = 0;
-                const siblings = element.parentNode.childNodes;
-                for (let i = 0; i < siblings.length; i++) {
-                    const sibling = siblings[i];
-                    if (sibling === element) {
-                        return getElementXPath(element.parentNode) + '/' + element.tagName.toLowerCase() + '[' + (ix + 1) + ']';
+                for (let node = element; node && node.nodeType === 1; node = node.parentNode) {
+                    const cached = xpathCache.get(node);
+                    if (cached !== undefined) {
+                        path = cached;
+                        break;
+                    }
+                    if (node.id !== '') {
+                        path = `//*[@id="${node.id}"]`;
+                        xpathCache.set(node, path);
+                        break;
                     }
-                    if (sibling.nodeType === 1 && sibling.tagName === element.tagName) {
-                        ix++;
+                    if (node === document.body) {
+                        path = '//body';
+                        break;
                     }
+                    
+                    // Position among same-tag siblings
+                    let ix = 1;
+                    for (let sibling = node.previousElementSibling; sibling; sibling = sibling.previousElementSibling) {
+                        if (sibling.tagName === node.tagName) {
+                            ix++;
+                        }
+                    }
+                    nodes.push(node);
+                    parts.push('/' + node.tagName.toLowerCase() + '[' + ix + ']');
+                }
+                
+                for (let i = nodes.length - 1; i >= 0; i--) {
+                    path += parts[i];
+                    xpathCache.set(nodes[i], path);
                 }
+                return path;
             }
             
             // Helper function to get bounding box
-            function getBoundingBox(element) {
-                const rect = element.getBoundingClientRect();
+            function getBoundingBox(rect) {
                 return {
                     x: Math.round(rect.x),
                     y: Math.round(rect.y),
@@ -838,71 +1048,146 @@ async def get_page_structure(focus_keywords: Optional[str] = None) -> Union[Dict
             }
             
             // Helper function to get element state
-            function getElementState(element) {
-                const computedStyle = window.getComputedStyle(element);
+            // checkVisibility resolves display and visibility natively, including
+            // ancestors, without the offsetParent layout read
+            const hasCheckVisibility = typeof Element.prototype.checkVisibility === 'function';
+            function isVisible(element, style) {
+                if (hasCheckVisibility) {
+                    return element.checkVisibility({ checkVisibilityCSS: true });
+                }
+                return style.display !== 'none' && style.visibility !== 'hidden' && element.offsetParent !== null;
+            }
+            
+            function getElementState(element, tag) {
+                // Read the computed style once and share it with the visibility check
+                const style = window.getComputedStyle(element);
                 return {
-                    visible: computedStyle.display !== 'none' && computedStyle.visibility !== 'hidden' && element.offsetParent !== null,
+                    visible: isVisible(element, style),
                     enabled: !element.disabled,
                     focused: document.activeElement === element,
                     checked: element.checked || false,
                     selected: element.selected || false,
                     value: element.value || '',
-                    clickable: element.tagName.toLowerCase() === 'button' || 
-                              element.tagName.toLowerCase() === 'a' ||
+                    clickable: tag === 'button' || 
+                              tag === 'a' ||
                               element.onclick !== null ||
                               element.getAttribute('onclick') !== null ||
-                              computedStyle.cursor === 'pointer'
+                              style.cursor === 'pointer'
                 };
             }
             
-            // Get interactive elements
-            const interactive_selectors = [
+            // Get interactive elements in a single DOM traversal; the joined selector
+            // returns each element once, in document order
+            const interactive_selector = [
                 'input', 'button', 'select', 'textarea', 'a[href]', 
                 '[onclick]', '[role="button"]', '[tabindex]',
                 'form', 'label', '[contenteditable="true"]'
-            ];
+            ].join(',');
             
-            let elementIndex = 0;
-            interactive_selectors.forEach(selector => {
-                document.querySelectorAll(selector).forEach(element => {
-                    const ref = generateRef(element, elementIndex++);
-                    element.setAttribute('data-ref', ref);
-                    
-                    const elementInfo = {
-                        ref: ref,
-                        tag: element.tagName.toLowerCase(),
-                        type: element.type || null,
-                        selectors: getSelectors(element),
-                        attributes: {
-                            id: element.id || null,
-                            name: element.name || null,
-                            class: element.className || null,
-                            placeholder: element.placeholder || null,
-                            required: element.required || false,
-                            disabled: element.disabled || false
-                        },
-                        state: getElementState(element),
-                        boundingBox: getBoundingBox(element),
-                        text: {
-                            content: element.textContent ? element.textContent.trim().substring(0, 100) : '',
-                            label: element.getAttribute('aria-label') || 
-                                   (element.labels && element.labels[0] ? element.labels[0].textContent.trim() : ''),
-                            placeholder: element.placeholder || ''
+            // Summary counts and forms cover the whole document, hidden elements included
+            const summary = {
+                buttons: 0,
+                inputs: 0,
+                links: 0,
+                dropdowns: 0,
+                forms: 0
+            };
+            const formNodes = [];
+            const emittedRefs = new Set();  // refs of the elements reported in elements
+            
+            const nodes = document.querySelectorAll(interactive_selector);
+            
+            // Pass 1: DOM writes and attribute reads only. Tagging every element up
+            // front means the layout reads below never follow a write, so style and
+            // layout are computed once instead of being invalidated for every element
+            const refs = [];
+            const tags = [];
+            nodes.forEach((element, index) => {
+                const tag = element.tagName.toLowerCase();
+                const ref = generateRef(tag, index);
+                element.setAttribute('data-ref', ref);
+                tags.push(tag);
+                refs.push(ref);
+                
+                switch (tag) {
+                    case 'button':
+                        summary.buttons++;
+                        break;
+                    case 'input':
+                        summary.inputs++;
+                        if (element.type === 'button' || element.type === 'submit') {
+                            summary.buttons++;
                         }
-                    };
-                    
-                    elements.push(elementInfo);
-                });
+                        break;
+                    case 'a':
+                        if (element.hasAttribute('href')) {
+                            summary.links++;
+                        }
+                        break;
+                    case 'select':
+                        summary.dropdowns++;
+                        break;
+                    case 'form':
+                        summary.forms++;
+                        formNodes.push(element);
+                        break;
+                }
+            });
+            
+            // Pass 2: reads only, no DOM mutation
+            nodes.forEach((element, index) => {
+                // Elements without a box are not rendered; skip them before the
+                // selector, XPath and style work unless hidden ones were asked for
+                const rect = element.getBoundingClientRect();
+                if (!includeHidden && rect.width === 0 && rect.height === 0) {
+                    return;
+                }
+                
+                const ref = refs[index];
+                
+                // Read each property once and share it with the helpers
+                const tag = tags[index];
+                const id = element.id;
+                const cls = element.className;
+                const ariaLabel = element.getAttribute('aria-label');
+                const content = shortText(element);
+                
+                const elementInfo = {
+                    ref: ref,
+                    tag: tag,
+                    type: element.type || null,
+                    selectors: getSelectors(element, tag, id, ariaLabel, content),
+                    attributes: {
+                        id: id || null,
+                        name: element.name || null,
+                        class: cls || null,
+                        placeholder: element.placeholder || null,
+                        required: element.required || false,
+                        disabled: element.disabled || false
+                    },
+                    state: getElementState(element, tag),
+                    boundingBox: getBoundingBox(rect),
+                    text: {
+                        content: content,
+                        label: ariaLabel || 
+                               (element.labels && element.labels[0] ? element.labels[0].textContent.trim() : ''),
+                        placeholder: element.placeholder || ''
+                    }
+                };
+                
+                elements.push(elementInfo);
+                emittedRefs.add(ref);
             });
             
             // Get forms
-            document.querySelectorAll('form').forEach((form, index) => {
+            formNodes.forEach((form, index) => {
                 const formRef = `ref-form-${index}`;
                 const fieldRefs = [];
                 
+                // Only fields that were reported, so every ref can be looked up in elements
                 form.querySelectorAll('input, select, textarea, button').forEach(field => {
                     const fieldRef = field.getAttribute('data-ref');
-                    if (fieldRef) {
+                    if (fieldRef && emittedRefs.has(fieldRef)) {
                         fieldRefs.push(fieldRef);
                     }
                 });
@@ -916,15 +1201,6 @@ async def get_page_structure(focus_keywords: Optional[str] = None) -> Union[Dict
                 });
             });
             
-            // Summary counts
-            const summary = {
-                buttons: document.querySelectorAll('button, input[type="button"], input[type="submit"]').length,
-                inputs: document.querySelectorAll('input').length,
-                links: document.querySelectorAll('a[href]').length,
-                dropdowns: document.querySelectorAll('select').length,
-                forms: document.querySelectorAll('form').length
-            };
-            
             return {
                 url: window.location.href,
                 title: document.title,
@@ -939,14 +1215,27 @@ async def get_page_structure(focus_keywords: Optional[str] = None) -> Union[Dict
         }
         """
         
-        # Execute the structure analysis script
-        structure_data = await run_in_session_thread(
-            session_id,
-            lambda: browser.nova.page.evaluate(structure_script)
-        )
+        def extract_structure():
+            # Ensure browser is initialized
+            if not browser.is_initialized() and not browser.initialize_browser(True, None)[0]:
+                return None, None
+            
+            # Execute the structure analysis script
+            structure = browser.evaluate_page_function(
+                'pageStructure', structure_script, {'includeHidden': include_hidden}
+            )
+            
+            # Get current screenshot for reference
+            return structure, browser.take_screenshot()
         
-        # Get current screenshot for reference
-        screenshot_data = await run_in_session_thread(session_id, browser.take_screenshot)
+        # One hop for initialization, evaluation and screenshot: the page is bound to
+        # the session thread, so the two browser calls cannot run concurrently anyway
+        structure_data, screenshot_data = await run_in_session_thread(session_id, extract_structure)
+        if structure_data is None:
+            return {
+                "status": "error",
+                "message": "Failed to initialize browser"
+            }
         
         # Add URL to screenshot data for reference
         if screenshot_data:
@@ -957,66 +1246,77 @@ async def get_page_structure(focus_keywords: Optional[str] = None) -> Union[Dict
         }
         
         # Log structure data size and details
-        import json
-        original_elements_count = len(structure_data.get('elements', []))
+        elements = structure_data.get('elements', [])
+        original_elements_count = len(elements)
         forms_count = len(structure_data.get('forms', []))
         
-        # Check if structure is too large and apply keyword-based filtering if needed
-        structure_json = json.dumps(structure_data)
-        MAX_SIZE = 300000  # 300KB threshold
+        # Measure each element once; the size of any subset is then a running sum
+        # (compact JSON separates list items with a single ",")
+        element_sizes = [_json_size(element) for element in elements]
+        base_size = _json_size({**structure_data, 'elements': []})
+        structure_size = base_size + sum(element_sizes) + max(len(element_sizes) - 1, 0)
+        MAX_SIZE = 300000  # 300KB threshold, in UTF-8 bytes of compact JSON
         
-        if len(structure_json) > MAX_SIZE and focus_keywords:
-            print(f"⚠️  PAGE STRUCTURE: Too large ({len(structure_json)} chars), applying keyword filtering")
+        # Check if structure is too large and apply keyword-based filtering if needed
+        if structure_size > MAX_SIZE and focus_keywords:
+            print(f"⚠️  PAGE STRUCTURE: Too large ({structure_size} bytes), applying keyword filtering")
             keywords = [kw.strip().lower() for kw in focus_keywords.split(',')][:10]  # Limit to max 10 keywords
+            keywords_lower = tuple(keywords)  # Immutable copy for the per-element scoring
             print(f"🔍 Filtering by keywords: {keywords}")
             
             # Score and filter elements based on keyword relevance
             scored_elements = []
             essential_elements = []  # Always include these for completeness
             
-            for element in structure_data.get('elements', []):
+            for element, size in zip(elements, element_sizes):
                 # Always include essential interactive elements regardless of keywords
                 tag = element.get('tag', '').lower()
                 element_type = element.get('type', '').lower()
                 if tag == 'form' or element_type in ['submit', 'button'] or tag == 'button':
-                    essential_elements.append((999, element))  # High priority score
+                    essential_elements.append((999, element, size))  # High priority score
                 
-                score = _calculate_element_relevance_score(element, keywords)
+                score = _score_indexed_element(_index_element(element), keywords_lower)
                 if score > 0:  # Only include elements with some relevance
-                    scored_elements.append((score, element))
+                    scored_elements.append((score, element, size))
             
             # Combine essential and scored elements, remove duplicates
             all_scored = essential_elements + scored_elements
             seen_refs = set()
             unique_elements = []
-            for score, element in all_scored:
-                ref = element.get('ref', '')
+            for entry in all_scored:
+                ref = entry[1].get('ref', '')
                 if ref not in seen_refs:
                     seen_refs.add(ref)
-                    unique_elements.append((score, element))
+                    unique_elements.append(entry)
             
             scored_elements = unique_elements
             
-            # Sort by score (highest first) and take top elements that fit within size limit
-            scored_elements.sort(key=lambda x: x[0], reverse=True)
+            # Rank by score (highest first) and take top elements that fit within size limit.
+            # Only the best candidates can fit, so select the top k (twice what fits at the
+            # average element size) instead of sorting them all; if even those all fit,
+            # the loop below may need more and we fall back to a full sort
+            average_size = sum(element_sizes) // max(len(element_sizes), 1)
+            k = min(len(scored_elements), max(50, 2 * MAX_SIZE // max(average_size, 1)))
+            ranked = heapq.nlargest(k, scored_elements, key=lambda x: x[0])
+            if k < len(scored_elements) and base_size + sum(x[2] for x in ranked) + k - 1 <= MAX_SIZE:
+                ranked = sorted(scored_elements, key=lambda x: x[0], reverse=True)
             
             # Incrementally add elements until we reach a reasonable size
             filtered_elements = []
-            temp_structure = structure_data.copy()
+            structure_size = base_size
             
-            for score, element in scored_elements:
-                temp_structure['elements'] = filtered_elements + [element]
-                temp_json = json.dumps(temp_structure)
-                if len(temp_json) > MAX_SIZE and len(filtered_elements) > 20:  # Keep at least 20 elements
+            for score, element, size in ranked:
+                next_size = structure_size + size + (1 if filtered_elements else 0)
+                if next_size > MAX_SIZE and len(filtered_elements) > 20:  # Keep at least 20 elements
                     break
                 filtered_elements.append(element)
+                structure_size = next_size
             
             structure_data['elements'] = filtered_elements
-            structure_json = json.dumps(structure_data)
             
             print(f"🎯 Filtered to {len(filtered_elements)} most relevant elements")
             print(f"📊 Top scored elements:")
-            for i, (score, element) in enumerate(scored_elements[:5]):
+            for i, (score, element, _) in enumerate(ranked[:5]):
                 element_desc = f"{element.get('tag', 'unknown')}#{element.get('attributes', {}).get('id', '')} - {element.get('text', {}).get('content', '')[:30]}"
                 print(f"  {i+1}. Score {score}: {element_desc}")
             
@@ -1026,23 +1326,23 @@ async def get_page_structure(focus_keywords: Optional[str] = None) -> Union[Dict
                 'keywords': keywords,
                 'original_elements': original_elements_count,
                 'filtered_elements': len(filtered_elements),
-                'essential_elements_included': len([e for s, e in essential_elements]),
+                'essential_elements_included': len(essential_elements),
                 'note': 'Filtered elements retain full selector, state, and bounding box information for JavaScript execution and quick_action'
             }
         
-        elif len(structure_json) > MAX_SIZE:
-            print(f"⚠️  PAGE STRUCTURE: Too large ({len(structure_json)} chars) but no keywords provided")
+        elif structure_size > MAX_SIZE:
+            print(f"⚠️  PAGE STRUCTURE: Too large ({structure_size} bytes) but no keywords provided")
             print(f"💡 Consider using focus_keywords parameter like: 'search,filter,sort' or 'checkout,cart,payment'")
             # Fallback to simple truncation
-            structure_data['elements'] = structure_data['elements'][:100]
-            structure_json = json.dumps(structure_data)
+            structure_data['elements'] = elements[:100]
+            structure_size = base_size + sum(element_sizes[:100]) + max(len(element_sizes[:100]) - 1, 0)
         
         final_elements_count = len(structure_data.get('elements', []))
         
         print(f"🔍 PAGE STRUCTURE DEBUG:")
         print(f"  Elements found: {final_elements_count} (from original {original_elements_count})")
         print(f"  Forms found: {forms_count}")
-        print(f"  JSON size: {len(structure_json)} characters")
+        print(f"  JSON size: {structure_size} bytes")
         print(f"  Structure keys: {list(structure_data.keys())}")
         if final_elements_count > 0:
             print(f"  First element: {structure_data['elements'][0].get('tag', 'unknown')} - {structure_data['elements'][0].get('ref', 'no-ref')}")
@@ -1053,7 +1353,14 @@ async def get_page_structure(focus_keywords: Optional[str] = None) -> Union[Dict
     except Exception as e:
         return create_error_response(e, "get page structure")
 
+# Predicates for wait_for_condition. The values are passed as arguments rather than
+# formatted into the source, so quotes in them are safe and the source never changes
+_TEXT_APPEARS_PREDICATE = "(text) => document.body.textContent.includes(text)"
+_TEXT_DISAPPEARS_PREDICATE = "(text) => !document.body.textContent.includes(text)"
+_URL_CHANGED_PREDICATE = "(url) => window.location.href !== url"
+
 @mcp.tool()
+@with_request_context
 async def wait_for_condition(
     condition_type: str,
     text: Optional[str] = None,
@@ -1085,7 +1392,7 @@ async def wait_for_condition(
             }
         
         timeout = 5  # Fixed 5 second timeout
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         def wait_condition():
             page = browser.nova.page
@@ -1093,18 +1400,12 @@ async def wait_for_condition(
             if condition_type == 'text_appears':
                 if not text:
                     raise ValueError("text is required for text_appears condition")
-                page.wait_for_function(
-                    f"() => document.body.textContent.includes('{text}')",
-                    timeout=timeout * 1000
-                )
+                page.wait_for_function(_TEXT_APPEARS_PREDICATE, arg=text, timeout=timeout * 1000)
                 
             elif condition_type == 'text_disappears':
                 if not text:
                     raise ValueError("text is required for text_disappears condition")
-                page.wait_for_function(
-                    f"() => !document.body.textContent.includes('{text}')",
-                    timeout=timeout * 1000
-                )
+                page.wait_for_function(_TEXT_DISAPPEARS_PREDICATE, arg=text, timeout=timeout * 1000)
                 
             elif condition_type == 'element_visible':
                 if not target:
@@ -1121,10 +1422,7 @@ async def wait_for_condition(
                 
             elif condition_type == 'url_change':
                 current_url = page.url
-                page.wait_for_function(
-                    f"() => window.location.href !== '{current_url}'",
-                    timeout=timeout * 1000
-                )
+                page.wait_for_function(_URL_CHANGED_PREDICATE, arg=current_url, timeout=timeout * 1000)
                 
             else:
                 raise ValueError(f"Unknown condition type: {condition_type}")
@@ -1132,8 +1430,7 @@ async def wait_for_condition(
         # Execute wait condition
         await run_in_session_thread(session_id, wait_condition)
         
-        end_time = datetime.now()
-        waited_time = (end_time - start_time).total_seconds()
+        waited_time = time.perf_counter() - start_time
         
         # Get current state for verification
         current_url = await run_in_session_thread(session_id, browser.get_current_url)
@@ -1151,8 +1448,7 @@ async def wait_for_condition(
         }
         
     except Exception as e:
-        end_time = datetime.now()
-        waited_time = (end_time - start_time if 'start_time' in locals() else datetime.now()).total_seconds()
+        waited_time = time.perf_counter() - start_time if 'start_time' in locals() else 0.0
         
         if "TimeoutError" in str(e) or "timeout" in str(e).lower():
             return {
@@ -1169,6 +1465,7 @@ async def wait_for_condition(
             return create_error_response(e, f"wait for condition '{condition_type}'")
 
 @mcp.tool()
+@with_request_context
 async def execute_js(script: str) -> Dict[str, Any]:
     """
     Execute JavaScript code in the browser context and return the result.
@@ -1190,7 +1487,7 @@ async def execute_js(script: str) -> Dict[str, Any]:
                 "message": "Browser not initialized"
             }
         
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         def execute_script():
             page = browser.nova.page
@@ -1224,8 +1521,7 @@ async def execute_js(script: str) -> Dict[str, Any]:
         # Execute the JavaScript
         execution_result = await run_in_session_thread(session_id, execute_script)
         
-        end_time = datetime.now()
-        execution_time = (end_time - start_time).total_seconds()
+        execution_time = time.perf_counter() - start_time
         
         current_url = await run_in_session_thread(session_id, browser.get_current_url)
         
@@ -1259,7 +1555,40 @@ async def execute_js(script: str) -> Dict[str, Any]:
     except Exception as e:
         return create_error_response(e, "execute JavaScript")
 
+def _quick_click(element, value, options):
+    button = options.get('button', 'left')
+    if options.get('double', False):
+        element.dblclick(button=button)
+    else:
+        element.click(button=button)
+
+def _quick_type(element, value, options):
+    if not value:
+        raise ValueError("value is required for type action")
+    if options.get('clear_first', True):
+        element.clear()
+    element.fill(value)
+
+def _quick_select(element, value, options):
+    if not value:
+        raise ValueError("value is required for select action")
+    element.select_option(value)
+
+# quick_action handlers by action name, each called as handler(locator, value, options)
+_QUICK_ACTIONS = {
+    'click': _quick_click,
+    'type': _quick_type,
+    'clear': lambda element, value, options: element.clear(),
+    'select': _quick_select,
+    'check': lambda element, value, options: element.check(),
+    'uncheck': lambda element, value, options: element.uncheck(),
+    'hover': lambda element, value, options: element.hover(),
+    'focus': lambda element, value, options: element.focus(),
+    'scroll_to': lambda element, value, options: element.scroll_into_view_if_needed(),
+}
+
 @mcp.tool()
+@with_request_context
 async def quick_action(
     action: str,
     target_ref: Optional[str] = None,
@@ -1315,7 +1644,8 @@ async def quick_action(
             }
         
         options = options or {}
-        start_time = datetime.now()
+        perform = _QUICK_ACTIONS.get(action)
+        start_time = time.perf_counter()
         
         def perform_action():
             page = browser.nova.page
@@ -1329,45 +1659,9 @@ async def quick_action(
                     raise ValueError(f"Element not found: {selector}")
                 
                 # Perform the action
-                if action == 'click':
-                    button = options.get('button', 'left')
-                    if options.get('double', False):
-                        element.dblclick(button=button)
-                    else:
-                        element.click(button=button)
-                    
-                elif action == 'type':
-                    if not value:
-                        raise ValueError("value is required for type action")
-                    if options.get('clear_first', True):
-                        element.clear()
-                    element.fill(value)
-                    
-                elif action == 'clear':
-                    element.clear()
-                    
-                elif action == 'select':
-                    if not value:
-                        raise ValueError("value is required for select action")
-                    element.select_option(value)
-                    
-                elif action == 'check':
-                    element.check()
-                    
-                elif action == 'uncheck':
-                    element.uncheck()
-                    
-                elif action == 'hover':
-                    element.hover()
-                    
-                elif action == 'focus':
-                    element.focus()
-                    
-                elif action == 'scroll_to':
-                    element.scroll_into_view_if_needed()
-                    
-                else:
+                if perform is None:
                     raise ValueError(f"Unknown action: {action}")
+                perform(element, value, options)
                 
                 # Check if page changed (URL or content)
                 new_url = page.url
@@ -1388,8 +1682,7 @@ async def quick_action(
         # Execute the action
         action_result = await run_in_session_thread(session_id, perform_action)
         
-        end_time = datetime.now()
-        execution_time = (end_time - start_time).total_seconds()
+        execution_time = time.perf_counter() - start_time
         
         if action_result["success"]:
             # Get current page state
@@ -1431,19 +1724,29 @@ async def quick_action(
 
 
 
-def cleanup_resources_sync():
+def cleanup_resources_sync(pending_sessions=frozenset()):
     """
     Comprehensive shutdown process - prevent resource leaks through reference cleanup
+    
+    Controllers of pending_sessions are still being closed on their session threads;
+    they are not closed again here, only their leftover processes are swept.
     """
     global _browser_controllers, _is_shutting_down
     _is_shutting_down = True
     
-    if _browser_controllers:
+    # Take the controllers out under the lock and close them after releasing it
+    with _browser_lock:
+        controllers = list(_browser_controllers.items())
+        _browser_controllers.clear()
+    
+    if controllers:
         try:
             logger.info("Closing all browser resources...")
             
             # Close all session browser controllers
-            for session_id, controller in list(_browser_controllers.items()):
+            for session_id, controller in controllers:
+                if session_id in pending_sessions:
+                    continue
                 try:
                     if controller:
                         logger.info(f"Closing browser for session {session_id}")
@@ -1451,60 +1754,26 @@ def cleanup_resources_sync():
                 except Exception as e:
                     logger.error(f"Error closing browser for session {session_id}: {e}")
             
-            # Clear all references
-            _browser_controllers.clear()
-            
-            # Force terminate any remaining Chrome processes
-            try:
-                import psutil
-                import os
-                
-                current_pid = os.getpid()
-                parent_process = psutil.Process(current_pid)
-                
-                # Find all Chrome/Chromium child processes
-                chrome_processes = []
-                for child in parent_process.children(recursive=True):
-                    try:
-                        if child.name().lower() in ['chrome', 'chromium', 'google chrome']:
-                            chrome_processes.append(child)
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
-                
-                if chrome_processes:
-                    logger.info(f"Force terminating {len(chrome_processes)} remaining Chrome processes")
-                    
-                    # Terminate all Chrome processes
-                    for proc in chrome_processes:
-                        try:
-                            logger.info(f"Terminating Chrome process {proc.pid}")
-                            proc.terminate()
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
-                            continue
-                    
-                    # Wait and kill if still running
-                    import time
-                    time.sleep(1.0)
-                    
-                    for proc in chrome_processes:
-                        try:
-                            if proc.is_running():
-                                logger.warning(f"Force killing Chrome process {proc.pid}")
-                                proc.kill()
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
-                            continue
-                            
-            except ImportError:
-                logger.warning("psutil not available for process cleanup")
-            except Exception as e:
-                logger.error(f"Error in process cleanup: {e}")
+            # Force terminate the browsers that are still running. Playwright launches each
+            # one detached, as the leader of its own process group, and the controllers record
+            # those groups at launch, so one killpg per browser reaches all of its helper
+            # processes without enumerating processes
+            browser_groups = list(browser_process_groups)
+            if browser_groups:
+                logger.info(f"Force terminating {len(browser_groups)} remaining Chrome process groups")
+                try:
+                    killed = kill_process_groups(browser_groups)
+                    browser_process_groups.difference_update(browser_groups)
+                    logger.info(f"{len(browser_groups) - killed} of {len(browser_groups)} Chrome process groups exited after SIGTERM")
+                except Exception as e:
+                    logger.error(f"Error in process cleanup: {e}")
             
-            # Shutdown all session ThreadPools
-            shutdown_all_session_thread_pools()
+            # Shutdown all session ThreadPools; joining one that still runs a close would block
+            shutdown_all_session_thread_pools(wait=not pending_sessions)
             
-            # Force garbage collection
-            import gc
-            gc.collect()
+            # Collect the young cycles left by closed controllers, unless the process is exiting anyway
+            if not _process_exiting:
+                gc.collect(0)
             
             logger.info("Resource cleanup completed")
         except Exception as e:
@@ -1513,13 +1782,20 @@ def cleanup_resources_sync():
     
     # Continue shutdown process
 
+async def _cancel_and_wait(task: asyncio.Task):
+    """Cancel a task and wait until it has actually finished"""
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
 # Use ThreadPoolExecutor for timeout-safe shutdown
 async def shutdown_server(timeout=5.0):
     """
     Gracefully shutdown the server and clean up resources with timeout
     """
     global _browser_controllers, _is_shutting_down, _shutdown_event
-    import threading
     logger.info(f"Shutdown starting in thread ID: {threading.get_ident()}")
 
     if _is_shutting_down:
@@ -1535,16 +1811,16 @@ async def shutdown_server(timeout=5.0):
         tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
         logger.info(f"Cancelling {len(tasks)} running tasks")
         
-        for task in tasks:
-            task.cancel()
-            cancelled_tasks += 1
-        
-        # Give tasks some time to cancel
+        # Give tasks some time to cancel, then report the ones that did not finish
         if tasks:
             try:
-                await asyncio.wait(tasks, timeout=min(2.0, timeout/2))
-            except (asyncio.CancelledError, Exception):
+                async with asyncio.timeout(min(2.0, timeout/2)):
+                    await asyncio.gather(*(_cancel_and_wait(task) for task in tasks), return_exceptions=True)
+            except TimeoutError:
                 pass
+            cancelled_tasks = sum(1 for task in tasks if task.done())
+            if cancelled_tasks < len(tasks):
+                logger.warning(f"{len(tasks) - cancelled_tasks} tasks still running after cancellation")
     except Exception as e:
         logger.error(f"Error cancelling tasks: {str(e)}")
     
@@ -1555,33 +1831,45 @@ async def shutdown_server(timeout=5.0):
         try:
             logger.info("Closing all browsers...")
             try:
-                # First try to close all controllers directly
-                for session_id, controller in list(_browser_controllers.items()):
-                    try:
-                        if controller and hasattr(controller, 'close'):
-                            result = controller.close()
-                            logger.info(f"Direct browser close result for {session_id}: {result}")
-                    except Exception as direct_error:
-                        logger.error(f"Direct browser close failed for {session_id}: {direct_error}")
-                
-                # Then try with executor as backup
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(cleanup_resources_sync)
-                    try:
-                        await asyncio.wait_for(
-                            asyncio.wrap_future(future),
-                            timeout=min(3.0, timeout * 0.6)  # Use shorter timeout for browser close
+                # First close all controllers concurrently, each on its own session
+                # thread since that is the thread its Playwright objects belong to
+                controllers = list(_browser_controllers.items())
+                results = await asyncio.gather(
+                    *(
+                        asyncio.wait_for(
+                            run_in_session_thread(session_id, controller.close),
+                            timeout=min(2.0, timeout * 0.4)
                         )
-                    except (asyncio.TimeoutError, Exception) as e:
-                        logger.warning(f"Browser close through executor had issues: {str(e)}")
+                        for session_id, controller in controllers
+                    ),
+                    return_exceptions=True
+                )
+                pending_sessions = set()
+                for (session_id, _), result in zip(controllers, results):
+                    if isinstance(result, asyncio.TimeoutError):
+                        pending_sessions.add(session_id)
+                        logger.warning(f"Browser close still pending for {session_id}, leaving it to the process sweep")
+                    elif isinstance(result, BaseException):
+                        logger.error(f"Direct browser close failed for {session_id}: {result}")
+                    else:
+                        logger.info(f"Direct browser close result for {session_id}: {result}")
+                
+                # Then sweep leftover browser processes as backup
+                try:
+                    await asyncio.wait_for(
+                        asyncio.to_thread(cleanup_resources_sync, pending_sessions),
+                        timeout=min(3.0, timeout * 0.6)  # Use shorter timeout for browser close
+                    )
+                except (asyncio.TimeoutError, Exception) as e:
+                    logger.warning(f"Browser cleanup sweep had issues: {str(e)}")
             except Exception as close_error:
                 logger.error(f"Error in browser close routine: {close_error}")
         finally:
             # Always clear all controller references
             _browser_controllers.clear()
     
-    # Shutdown all session ThreadPools
-    shutdown_all_session_thread_pools()
+    # Shutdown all session ThreadPools without joining their threads on the event loop
+    shutdown_all_session_thread_pools(wait=False)
     
     # Set shutdown event
     if _shutdown_event:
@@ -1590,24 +1878,22 @@ async def shutdown_server(timeout=5.0):
         except Exception as e:
             logger.error(f"Error setting shutdown event: {e}")
     
-    # Force garbage collection
-    try:
-        import gc
-        gc.collect()
-    except:
-        pass
+    # Collect the young cycles left by closed controllers, unless the process is exiting anyway
+    if not _process_exiting:
+        gc.collect(0)
     
     logger.info("Shutdown completed")
 
 def register_exit_handlers():
     def sync_signal_handler(signum, _):
-        global _is_shutting_down
+        global _is_shutting_down, _process_exiting
         if _is_shutting_down:
             logger.info("Already shutting down, ignoring signal")
             return
             
         logger.info(f"Received signal {signum}, cleaning up synchronously")
         _is_shutting_down = True
+        _process_exiting = True
         
         cleanup_resources_sync()
         
@@ -1633,11 +1919,13 @@ async def async_main(args):
     try:
         loop = asyncio.get_running_loop()
         for sig in (signal.SIGINT, signal.SIGTERM):
+            # Shielded so that cancelling the handler's future does not stop
+            # the shutdown halfway through closing browsers
             loop.add_signal_handler(
                 sig,
-                lambda _=sig: asyncio.create_task(
+                lambda _=sig: asyncio.ensure_future(asyncio.shield(
                     shutdown_server(timeout=1.0)
-                )
+                ))
             )
     except NotImplementedError:
         # Signal handlers not available on this platform (e.g., Windows)
@@ -1647,7 +1935,7 @@ async def async_main(args):
     
     # Start background session cleanup task
     cleanup_task = asyncio.create_task(session_cleanup_task())
-    logger.info(f"Started session cleanup task (TTL: {SESSION_TTL_SECONDS}s, interval: {SESSION_CLEANUP_INTERVAL}s)")
+    logger.info(f"Started session cleanup task (TTL: {SESSION_TTL_SECONDS}s)")
     
     try:
         logger.info("Starting MCP server...")
@@ -1691,7 +1979,22 @@ async def async_main(args):
     
     return 0
 
+async def run_streamable_http(args):
+    """Serve the Streamable HTTP transport with the session cleanup task running alongside"""
+    cleanup_task = asyncio.create_task(session_cleanup_task())
+    logger.info(f"Started session cleanup task (TTL: {SESSION_TTL_SECONDS}s)")
+    try:
+        await mcp.run_http_async(
+            transport="streamable-http", 
+            host=args.host, 
+            port=args.port,
+            path="/nova-act/mcp"
+        )
+    finally:
+        await _cancel_and_wait(cleanup_task)
+
 def main():
+    global _process_exiting
     import argparse
     
     parser = argparse.ArgumentParser(description="Browser Automation MCP Server")
@@ -1709,6 +2012,13 @@ def main():
     if args.verbose:
         logger.setLevel(logging.INFO)
     
+    # Everything imported so far lives until exit; move it out of the collector's
+    # view so later collections only trace objects created while serving
+    gc.freeze()
+    # Browser setup allocates many short-lived Playwright wrappers; a higher young
+    # generation threshold keeps collections from running in the middle of it
+    gc.set_threshold(GC_GEN0_THRESHOLD, 20, 20)
+    
     # Use asyncio.run with very short timeout for the entire operation
     try:
         if args.transport == "streamable-http":
@@ -1716,25 +2026,20 @@ def main():
             logger.info("Starting MCP server with Streamable HTTP transport on /nova-act/mcp...")
             
             # Use asyncio.run to properly handle the async method
-            asyncio.run(
-                mcp.run_http_async(
-                    transport="streamable-http", 
-                    host=args.host, 
-                    port=args.port,
-                    path="/nova-act/mcp"
-                )
-            )
+            asyncio.run(run_streamable_http(args))
         else:
             # Handle KeyboardInterrupt before it reaches asyncio.run()
             exit_code = asyncio.run(async_main(args))
             sys.exit(exit_code)
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt detected")
+        _process_exiting = True
         cleanup_resources_sync()
         sys.exit(0)
     except Exception as e:
         logger.error(f"Unhandled exception: {str(e)}")
         traceback.print_exc()
+        _process_exiting = True
         cleanup_resources_sync()
         sys.exit(1)
 
@@ -1,20 +1,93 @@
 import os
+import errno
 import shutil
 import tempfile
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Optional
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 logger = logging.getLogger("profile_manager")
 
+# Linux FICLONE ioctl: copy-on-write clone of a whole file (btrfs, xfs, overlayfs on those)
+FICLONE = 0x40049409
+_reflink_supported = fcntl is not None
+# Errors meaning the filesystem cannot reflink at all, as opposed to a failure of one file
+_REFLINK_UNSUPPORTED_ERRNOS = {errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY}
+
+# Profile entries Chrome regenerates on demand, plus lock files that would make the
+# cloned profile look in use ("Failed to create a ProcessSingleton")
+CLONE_IGNORED_NAMES = {
+    "Cache", "Code Cache", "GPUCache", "ShaderCache", "GrShaderCache", "CacheStorage",
+    "SingletonLock", "SingletonCookie", "SingletonSocket", "LOCK",
+}
+
+
+# LevelDB table files are written once and only ever deleted, never modified in place,
+# so a clone can share them with the base profile through a hard link
+HARDLINK_SUFFIXES = (".ldb",)
+
+
+def _ignore_regenerable(directory, names):
+    return [name for name in names if name in CLONE_IGNORED_NAMES]
+
+
+def _clone_file(src, dst, *, follow_symlinks=True):
+    """Copy a file, using a reflink when the filesystem supports it"""
+    global _reflink_supported
+    if _reflink_supported:
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst, follow_symlinks=follow_symlinks)
+            return dst
+        except OSError as e:
+            if e.errno in _REFLINK_UNSUPPORTED_ERRNOS:
+                # Not supported on this filesystem - stop trying for the rest of the process
+                _reflink_supported = False
+            # Otherwise only this file failed; copy it below and keep using reflinks
+    if src.endswith(HARDLINK_SUFFIXES):
+        try:
+            os.link(src, dst, follow_symlinks=follow_symlinks)
+            return dst
+        except OSError:
+            # Different filesystem or links not supported; fall back to copying
+            pass
+    return shutil.copy2(src, dst, follow_symlinks=follow_symlinks)
+
 class ProfileManager:
     """Manages browser profile directories for session isolation"""
     
     def __init__(self):
         self.session_profiles: Dict[str, str] = {}
+        self._base_nonempty_cache: Dict[str, bool] = {}
         self.temp_dir = Path(tempfile.gettempdir()) / "nova_browser_sessions"
         self.temp_dir.mkdir(exist_ok=True)
     
+    def _base_has_content(self, base_profile_dir: str) -> bool:
+        """Check whether the base profile exists and has at least one entry
+        
+        Only a positive answer is cached: a populated profile stays populated, while an
+        empty base may still be filled by a session that uses it without cloning.
+        """
+        if self._base_nonempty_cache.get(base_profile_dir):
+            return True
+        
+        try:
+            with os.scandir(base_profile_dir) as entries:
+                has_content = next(entries, None) is not None
+        except (FileNotFoundError, NotADirectoryError):
+            has_content = False
+        
+        if has_content:
+            self._base_nonempty_cache[base_profile_dir] = True
+        return has_content
+    
     def get_profile_for_session(self, session_id: str, base_profile_dir: str, clone_enabled: bool = True) -> str:
         """
         Get profile directory for a session
@@ -48,9 +121,14 @@ class ProfileManager:
                 shutil.rmtree(session_profile_dir, ignore_errors=True)
             
             # Clone base profile if it exists and has content
-            if os.path.exists(base_profile_dir) and os.listdir(base_profile_dir):
+            if self._base_has_content(base_profile_dir):
                 logger.info(f"Session {session_id}: Cloning base profile from {base_profile_dir}")
-                shutil.copytree(base_profile_dir, session_profile_dir)
+                shutil.copytree(
+                    base_profile_dir,
+                    session_profile_dir,
+                    ignore=_ignore_regenerable,
+                    copy_function=_clone_file
+                )
                 logger.info(f"Session {session_id}: Profile cloned to {session_profile_dir}")
             else:
                 # Create empty profile directory
@@ -101,8 +179,12 @@ class ProfileManager:
         """Clean up all temporary profile directories"""
         logger.info("Cleaning up all session profiles...")
         
-        for session_id in list(self.session_profiles.keys()):
-            self.cleanup_session_profile(session_id)
+        session_ids = list(self.session_profiles.keys())
+        if session_ids:
+            # rmtree time is mostly unlink syscalls, which release the GIL,
+            # so the profiles are removed in parallel
+            with ThreadPoolExecutor(max_workers=min(16, len(session_ids))) as executor:
+                list(executor.map(self.cleanup_session_profile, session_ids))
         
         # Clean up the main temp directory if empty
         try:
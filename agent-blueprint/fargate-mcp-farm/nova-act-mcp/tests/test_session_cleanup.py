@@ -0,0 +1,25 @@
+import sys
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+# The server modules import each other by their flat names from src/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import nova_act_server
+
+
+def test_idle_session_expires_under_streamable_http(monkeypatch):
+    monkeypatch.setattr(nova_act_server, "SESSION_TTL_SECONDS", 0.2)
+    observed = {}
+
+    async def fake_run_http_async(**kwargs):
+        observed["transport"] = kwargs["transport"]
+        nova_act_server.update_session_activity("idle-session")
+        await asyncio.sleep(0.6)
+        observed["expired"] = "idle-session" not in nova_act_server._session_metadata
+
+    monkeypatch.setattr(nova_act_server.mcp, "run_http_async", fake_run_http_async)
+    asyncio.run(nova_act_server.run_streamable_http(SimpleNamespace(host="127.0.0.1", port=0)))
+
+    assert observed == {"transport": "streamable-http", "expired": True}
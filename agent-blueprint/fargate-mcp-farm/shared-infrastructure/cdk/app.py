@@ -3,9 +3,13 @@
 MCP Farm Shared Infrastructure CDK App
 """
 
-import aws_cdk as cdk
 import os
-from aws_cdk import App
+
+# Skip construct stack-trace capture to speed up synth (must be set before
+# aws_cdk is imported, since the jsii runtime inherits the environment)
+os.environ.setdefault("CDK_DISABLE_STACK_TRACE", "1")
+
+from aws_cdk import App, Environment
 from stacks.mcp_farm_alb_stack import McpFarmAlbStack
 
 app = App()
@@ -24,7 +28,7 @@ McpFarmAlbStack(
     app, "McpFarmAlbStack",
     allowed_mcp_cidrs=allowed_mcp_cidrs,
     description="MCP Farm Shared Application Load Balancer with CIDR restrictions",
-    env=cdk.Environment(
+    env=Environment(
         account=app.node.try_get_context("account"),
         region=app.node.try_get_context("region") or "us-west-2"
     )